@@ -13,24 +13,66 @@ from routes.favorite import favorite_routes
 
 from datetime import datetime
 from extensions import cache
+from caching import cache_stats, invalidate_tags
+from search_index import rebuild_search_index
+from counters import recount_post_counters
+from error_response import error_response
+from passwords import PasswordPoolBusy
+from fieldsets import InvalidFields
+from includes import InvalidInclude
+from batch import InvalidBatch, InvalidIds
+from metrics import init_metrics
+from slow_query import init_slow_query_log
+from request_logging import init_request_logging
+from compression import init_compression
+from json_provider import json_provider_class
+import migrations
 
-import logging
 import os
 
 load_dotenv()
 
 ### Flask App and Database Configuration ###
 app = Flask(__name__)
+app.json = json_provider_class()(app)
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv("DATABASE_URI")
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = os.getenv("FLASK_SECRET_KEY")
 app.config['JWT_SECRET_KEY'] = os.getenv("JWT_SECRET_KEY")
 app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(minutes=15)
-app.config['CACHE_TYPE'] = 'SimpleCache'
-app.config['CACHE_DEFAULT_TIMEOUT'] = 60
+app.config['BCRYPT_LOG_ROUNDS'] = int(os.getenv("BCRYPT_LOG_ROUNDS", 12))
+app.config['PASSWORD_POOL_SIZE'] = int(os.getenv("PASSWORD_POOL_SIZE", 2))
+app.config['PASSWORD_POOL_QUEUE'] = int(os.getenv("PASSWORD_POOL_QUEUE", 8))
+app.config['PASSWORD_POOL_TIMEOUT'] = int(os.getenv("PASSWORD_POOL_TIMEOUT", 10))
+app.config['CACHE_TYPE'] = 'caching.TieredCache'
+app.config['CACHE_DEFAULT_TIMEOUT'] = int(os.getenv("CACHE_DEFAULT_TIMEOUT", 600))
+app.config['CACHE_SHARED_BACKEND'] = os.getenv("CACHE_SHARED_BACKEND", "filesystem")
+app.config['CACHE_DIR'] = os.getenv("CACHE_DIR", os.path.join(app.instance_path, "cache"))
+app.config['CACHE_REDIS_URL'] = os.getenv("CACHE_REDIS_URL")
+app.config['CACHE_NEAR_THRESHOLD'] = int(os.getenv("CACHE_NEAR_THRESHOLD", 500))
+app.config['CACHE_NEAR_TIMEOUT'] = int(os.getenv("CACHE_NEAR_TIMEOUT", 5))
+app.config['SLOW_QUERY_THRESHOLD_MS'] = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", 200))
+app.config['SLOW_QUERY_LOG'] = os.getenv("SLOW_QUERY_LOG", os.path.join(app.instance_path, "logs", "slow_queries.log"))
+app.config['SLOW_QUERY_LOG_MAX_BYTES'] = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", 10 * 1024 * 1024))
+app.config['SLOW_QUERY_LOG_BACKUPS'] = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", 5))
+app.config['COMPRESS_MIN_SIZE'] = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+app.config['COMPRESS_LEVEL'] = int(os.getenv("COMPRESS_LEVEL", 6))
+app.config['COMPRESS_BR_QUALITY'] = int(os.getenv("COMPRESS_BR_QUALITY", 5))
+app.config['COMPRESS_CACHE'] = os.getenv("COMPRESS_CACHE", "true").lower() == "true"
+app.config['BATCH_MAX_IDS'] = int(os.getenv("BATCH_MAX_IDS", 100))
+app.config['BATCH_MAX_ITEMS'] = int(os.getenv("BATCH_MAX_ITEMS", 500))
+app.config['LOG_LEVEL'] = os.getenv("LOG_LEVEL", "INFO")
+app.config['LOG_FILE'] = os.getenv("LOG_FILE")
+app.config['LOG_QUEUE_SIZE'] = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+app.config['LOG_SAMPLE_RATE_2XX'] = float(os.getenv("LOG_SAMPLE_RATE_2XX", 0.1))
 
 cache.init_app(app)
 db.init_app(app)
+# First, so their hooks see every request, including those rejected by later hooks
+init_metrics(app)
+init_request_logging(app)
+init_slow_query_log(app)
+init_compression(app)
 jwt = JWTManager(app)
 swagger = Swagger(app, template={
     "swagger": "2.0",
@@ -48,18 +90,61 @@ swagger = Swagger(app, template={
     }
 })
 
-def create_tables():
-    db.create_all()
+### Readiness gate ###
+# The schema is created or upgraded once, before the workers start
+# (`flask db-upgrade`), never on the request path. Until the database
+# reports the latest schema version, API requests get a 503.
+def schema_ready():
+    if not app.extensions.get("schema_ready"):
+        app.extensions["schema_ready"] = migrations.is_up_to_date(db.engine)
+    return app.extensions["schema_ready"]
 
 @app.before_request
-def ensure_tables_exist():
-    if not app.config.get("TESTING", False):
-        create_tables()
-        
-### Middleware to log requests ###
-@app.before_request
-def log_request_info():
-    logging.info(f"{datetime.now().isoformat()} - {request.method} {request.path}")
+def require_schema():
+    if app.config.get("TESTING", False) or request.path in ("/health", "/ready"):
+        return None
+    if not schema_ready():
+        return error_response(
+            status=503,
+            code='SERVICE_UNAVAILABLE',
+            message='Database schema is not initialized'
+        )
+
+@app.errorhandler(PasswordPoolBusy)
+def password_pool_busy(e):
+    response, status = error_response(
+        status=503,
+        code='SERVICE_UNAVAILABLE',
+        message='Too many password operations in progress, retry later'
+    )
+    response.headers['Retry-After'] = '1'
+    return response, status
+
+@app.errorhandler(InvalidFields)
+def invalid_fields(e):
+    return error_response(
+        status=400,
+        code='INVALID_QUERY_PARAM',
+        message='Unknown field in fields parameter',
+        details={'unknown': e.unknown, 'allowed': e.allowed}
+    )
+
+@app.errorhandler(InvalidInclude)
+def invalid_include(e):
+    return error_response(
+        status=400,
+        code='INVALID_QUERY_PARAM',
+        message='Unknown relation in include parameter',
+        details={'unknown': e.unknown, 'allowed': e.allowed}
+    )
+
+@app.errorhandler(InvalidIds)
+def invalid_ids(e):
+    return error_response(status=400, code='INVALID_QUERY_PARAM', message=str(e))
+
+@app.errorhandler(InvalidBatch)
+def invalid_batch(e):
+    return error_response(status=400, code='INVALID_BATCH', message=str(e))
 
 ### Routes ###
 @app.route('/health', methods=['GET'])
@@ -87,12 +172,50 @@ def health_check():
             timestamp:
               type: string
               example: 2025-01-01T12:00:00Z
+            cache:
+              type: object
+              description: Response cache hit/miss counters of this worker
+            logging:
+              type: object
+              description: Log records waiting to be written and dropped because the queue was full
     """
     return jsonify({
         "status": "UP",
         "service": "Bookstore-api",
         "version": "1.0.0",
-        "timestamp": datetime.now().isoformat()
+        "timestamp": datetime.now().isoformat(),
+        "cache": cache_stats(),
+        "logging": app.extensions["request_logging"].stats()
+    }), 200
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """
+    Readiness Check
+    ---
+    tags:
+      - Health
+    responses:
+      200:
+        description: Database schema is up to date, the service can take traffic
+      503:
+        description: Database schema is missing or outdated
+    """
+    try:
+        ready = schema_ready()
+    except Exception:
+        app.logger.exception("Readiness check failed")
+        ready = False
+
+    if not ready:
+        return error_response(
+            status=503,
+            code='SERVICE_UNAVAILABLE',
+            message='Database schema is not initialized'
+        )
+    return jsonify({
+        "status": "READY",
+        "schema_version": migrations.LATEST_VERSION
     }), 200
 
 @app.route('/')
@@ -100,6 +223,34 @@ def index():
     from flask import redirect
     return redirect('/apidocs/')
 
+### CLI ###
+@app.cli.command("db-upgrade")
+def db_upgrade_command():
+    """Apply pending schema migrations."""
+    applied = migrations.upgrade(db.engine)
+    print(f"Applied migrations: {applied}" if applied else "Schema already up to date")
+    print(f"Schema version: {migrations.current_version(db.engine)}")
+
+@app.cli.command("recount-post-counters")
+def recount_post_counters_command():
+    """Recompute the comment and favorite counters of every post."""
+    with db.engine.begin() as conn:
+        fixed = recount_post_counters(conn)
+    if fixed:
+        # The Core UPDATE bypasses the cache invalidation hooks, and any
+        # post:{id} or listing entry may embed a counter
+        cache.clear()
+    print(f"Post counters recounted, {fixed} posts fixed")
+
+@app.cli.command("rebuild-search-index")
+def rebuild_search_index_command():
+    """Create the full-text index of posts if missing and refill it."""
+    with db.engine.begin() as conn:
+        rebuild_search_index(conn)
+    # Cached /posts/search results were answered from the old index
+    invalidate_tags({'posts:list'})
+    print("Search index rebuilt")
+
 users_routes(app)
 login_routes(app)
 posts_routes(app)
@@ -108,6 +259,8 @@ comment_routes(app)
 favorite_routes(app)
 
 if __name__ == '__main__':
+    with app.app_context():
+        migrations.upgrade(db.engine)
     app.run(
         host="0.0.0.0",
         port=3000
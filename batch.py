@@ -0,0 +1,112 @@
+from flask import current_app, jsonify, request
+from marshmallow import ValidationError
+from sqlalchemy import insert, select
+
+from error_response import error_response
+from models import db
+
+# Multi-get: `?ids=3,1,2` resolves every id with one IN query and returns
+# the items in the requested order, listing the ids that do not exist.
+#
+# Bulk writes: a JSON array of items is validated as a whole and written
+# with one multi-row INSERT in a single transaction. Either every valid
+# item is written or, if any item is invalid, none is.
+
+class InvalidIds(ValueError):
+    pass
+
+class InvalidBatch(ValueError):
+    pass
+
+def requested_ids():
+    """Ids asked for with ?ids=, in order and without duplicates."""
+    max_ids = current_app.config.get('BATCH_MAX_IDS', 100)
+    try:
+        ids = [int(value) for value in request.args['ids'].split(',') if value.strip()]
+    except ValueError:
+        raise InvalidIds('ids must be a comma-separated list of integers')
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise InvalidIds('ids must not be empty')
+    if len(ids) > max_ids:
+        raise InvalidIds(f'At most {max_ids} ids per request')
+    return ids
+
+def fetch_by_ids(query, model, ids):
+    """Return (items in the order of `ids`, ids not found)."""
+    found = {item.id: item for item in query.filter(model.id.in_(ids))}
+    return [found[i] for i in ids if i in found], [i for i in ids if i not in found]
+
+def batch_response(data, missing, message):
+    return jsonify({
+        'status': 'success',
+        'message': message,
+        'data': data,
+        'missing': missing
+    }), 200
+
+### Bulk writes ###
+def batch_items(schema):
+    """
+    Validate the JSON array body with `schema`.
+
+    Returns (items, errors): `items` has the loaded item, or None, at the
+    index of each input item; `errors` maps indexes to validation messages.
+    """
+    body = request.get_json(silent=True)
+    max_items = current_app.config.get('BATCH_MAX_ITEMS', 500)
+    if not isinstance(body, list) or not body:
+        raise InvalidBatch('Body must be a non-empty JSON array')
+    if len(body) > max_items:
+        raise InvalidBatch(f'At most {max_items} items per batch')
+
+    items, errors = [], {}
+    for index, item in enumerate(body):
+        try:
+            items.append(schema.load(item))
+        except ValidationError as e:
+            items.append(None)
+            errors[index] = e.messages
+    return items, errors
+
+def check_references(items, errors, field, model, message):
+    """Add an error to every item whose `field` is not the id of an existing `model` row."""
+    wanted = {item[field] for item in items if item is not None}
+    existing = set(db.session.execute(select(model.id).where(model.id.in_(wanted))).scalars())
+    for index, item in enumerate(items):
+        if item is not None and item[field] not in existing:
+            errors.setdefault(index, {})[field] = [message]
+
+def rejected_batch(errors):
+    return error_response(
+        status=400,
+        code='INVALID_BATCH',
+        message='Some items are invalid, nothing was written',
+        details={'items': [{'index': index, 'errors': errors[index]} for index in sorted(errors)]}
+    )
+
+def bulk_insert(model, rows, *columns):
+    """
+    Insert `rows` with multi-row INSERTs; return (id, *columns) of each new row, in the order of `rows`.
+
+    SQLite hands out autoincrement ids in VALUES order, so sorting the
+    RETURNING rows by id maps them back to `rows`; sort_by_parameter_order
+    would make SQLAlchemy fall back to one INSERT per row there, as SQLite
+    has no insert sentinel. Other databases, PostgreSQL included, do not
+    promise a RETURNING order and let concurrent batches interleave ids,
+    so SQLAlchemy is asked to return the rows in parameter order.
+    """
+    if db.session.get_bind().dialect.name == 'sqlite':
+        statement = insert(model).returning(model.id, *columns)
+        return sorted(db.session.execute(statement, rows).all(), key=lambda row: row[0])
+    statement = insert(model).returning(model.id, *columns, sort_by_parameter_order=True)
+    return db.session.execute(statement, rows).all()
+
+def batch_created(results, message):
+    created = sum(1 for result in results if result['status'] == 201)
+    return jsonify({
+        'status': 'success',
+        'message': message,
+        'created': created,
+        'data': results
+    }), 201 if created else 200
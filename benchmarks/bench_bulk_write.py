@@ -0,0 +1,87 @@
+"""
+Compare writing items one request at a time with the batch endpoints.
+
+Creates the same number of posts, comments and favorites through the
+single-item routes (one request and one transaction per item) and through
+POST /posts/batch, /comments/batch and /favorites/batch, using the Flask
+test client against a file SQLite database.
+
+    python benchmarks/bench_bulk_write.py --items 2000 --batch-size 500
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ['DATABASE_URI'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ['CACHE_SHARED_BACKEND'] = 'simple'
+    os.environ['LOG_SAMPLE_RATE_2XX'] = '0'
+    os.environ.setdefault('JWT_SECRET_KEY', 'bench-bulk-write-not-a-real-secret-key')
+    os.environ['BATCH_MAX_ITEMS'] = str(args.batch_size)
+
+    from flask_jwt_extended import create_access_token
+    from app import app
+    from models import Category, User, db
+    import migrations
+
+    with app.app_context():
+        migrations.upgrade(db.engine)
+        users = [User(pseudo=f"bench{i}", mail=f"bench{i}@example.com", password_hash="x") for i in range(2)]
+        category = Category(name="Bench")
+        db.session.add_all([*users, category])
+        db.session.commit()
+        tokens = [{'Authorization': f"Bearer {create_access_token(identity=str(u.id))}"} for u in users]
+        category_id = category.id
+
+    client = app.test_client()
+    n, size = args.items, args.batch_size
+    post = lambda i: {'title': f"Post {i}", 'content': "Some content " * 20, 'category_id': category_id}
+    comment = lambda post_id: {'post_id': post_id, 'content': "Nice post"}
+
+    def single(headers):
+        ids = []
+        for i in range(n):
+            ids.append(client.post('/posts', json=post(i), headers=headers).json['data']['id'])
+        for post_id in ids:
+            client.post(f"/posts/{post_id}/comments", json={'content': "Nice post"}, headers=headers)
+        for post_id in ids:
+            client.post(f"/favorites/{post_id}", headers=headers)
+
+    def batched(headers):
+        ids = []
+        for start in range(0, n, size):
+            body = [post(i) for i in range(start, min(start + size, n))]
+            response = client.post('/posts/batch', json=body, headers=headers)
+            ids.extend(result['data']['id'] for result in response.json['data'])
+        for start in range(0, n, size):
+            client.post('/comments/batch', json=[comment(i) for i in ids[start:start + size]], headers=headers)
+        for start in range(0, n, size):
+            body = [{'post_id': i} for i in ids[start:start + size]]
+            client.post('/favorites/batch', json=body, headers=headers)
+
+    before = timed(lambda: single(tokens[0]))
+    after = timed(lambda: batched(tokens[1]))
+
+    items = n * 3
+    print(f"{'':<20}{'seconds':>10}{'items/s':>12}")
+    print(f"{'single-item routes':<20}{before:>10.2f}{items / before:>12.0f}")
+    print(f"{'batch routes':<20}{after:>10.2f}{items / after:>12.0f}")
+    print(f"Speedup: {before / after:.1f}x ({items} items, batches of {size})")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Measure the cost of serializing a page of posts to JSON.
+
+Builds a 100-post page (the `data` of GET /posts?limit=100) and times
+to_dict() plus serialization, as it was done before (isoformat() per row,
+Flask's default provider) and with the orjson provider the app uses now.
+Both sides serialize the same keys, the listing fields (Post.LIST_FIELDS).
+
+    python benchmarks/bench_json.py --posts 100 --rounds 2000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+def legacy_to_dict(post):
+    return {
+        "id": post.id,
+        "title": post.title,
+        "excerpt": post.excerpt,
+        "created_at": post.created_at.isoformat(),
+        "user_id": post.user_id,
+        "category_id": post.category_id
+    }
+
+def page(items):
+    return {
+        'status': 'success',
+        'message': 'Posts successfully retrieved',
+        'data': items,
+        'pagination': {'page': 1, 'limit': len(items), 'total_items': 1000, 'total_pages': 10},
+    }
+
+def measure(fn, rounds):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.fmean(timings), timings[len(timings) // 2], len(fn())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--posts', type=int, default=100)
+    parser.add_argument('--rounds', type=int, default=2000)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DATABASE_URI', 'sqlite:///:memory:')
+    os.environ.setdefault('CACHE_SHARED_BACKEND', 'simple')
+    from flask.json.provider import DefaultJSONProvider
+    from app import app
+    from models import Post
+
+    start = datetime(2025, 1, 1)
+    posts = [
+        Post(id=i, title=f"Post title number {i}", content="Lorem ipsum dolor sit amet. " * 20,
+             created_at=start + timedelta(seconds=i, microseconds=i), user_id=i % 50, category_id=i % 8)
+        for i in range(args.posts)
+    ]
+
+    default_provider = DefaultJSONProvider(app)
+    provider = app.json
+    # Compare equal payloads: only the serialization path may differ
+    assert list(legacy_to_dict(posts[0])) == list(Post.LIST_FIELDS)
+
+    with app.app_context():
+        def before():
+            return default_provider.response(page([legacy_to_dict(post) for post in posts])).get_data()
+
+        def after():
+            return provider.response(page([post.to_dict(Post.LIST_FIELDS) for post in posts])).get_data()
+
+        measure(before, args.rounds // 10)
+        measure(after, args.rounds // 10)
+        results = [
+            ("isoformat + default provider", measure(before, args.rounds)),
+            (f"{type(provider).__name__}", measure(after, args.rounds)),
+        ]
+
+    print(f"{args.posts} posts per page, {args.rounds} rounds")
+    print(f"{'':<32}{'mean ms':>10}{'p50 ms':>10}{'bytes':>10}")
+    for name, (mean, p50, size) in results:
+        print(f"{name:<32}{mean:>10.3f}{p50:>10.3f}{size:>10}")
+    print(f"Speedup: {results[0][1][0] / results[1][1][0]:.1f}x")
+
+if __name__ == '__main__':
+    main()
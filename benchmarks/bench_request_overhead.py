@@ -0,0 +1,70 @@
+"""
+Measure the per-request cost of the old `db.create_all()` before_request hook.
+
+Drives GET /users from several threads through the Flask test client
+against a file SQLite database, first as the app runs now (schema set up
+once by the migrations), then with the old hook put back.
+
+    python benchmarks/bench_request_overhead.py --requests 2000 --threads 4
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+def run(app, path, requests, threads):
+    def worker(count):
+        client = app.test_client()
+        timings = []
+        for _ in range(count):
+            start = time.perf_counter()
+            client.get(path)
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    with ThreadPoolExecutor(threads) as pool:
+        results = pool.map(worker, [requests // threads] * threads)
+    timings = sorted(t for result in results for t in result)
+    return {
+        'mean': statistics.fmean(timings),
+        'p50': timings[len(timings) // 2],
+        'p95': timings[int(len(timings) * 0.95)],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ['DATABASE_URI'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ['CACHE_SHARED_BACKEND'] = 'simple'
+
+    from app import app
+    from models import db
+    import migrations
+
+    with app.app_context():
+        migrations.upgrade(db.engine)
+
+    run(app, '/users', args.threads * 10, args.threads)
+    after = run(app, '/users', args.requests, args.threads)
+
+    def create_tables():
+        db.create_all()
+    app.before_request_funcs.setdefault(None, []).insert(0, create_tables)
+    before = run(app, '/users', args.requests, args.threads)
+
+    print(f"{'':<26}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    print(f"{'create_all per request':<26}{before['mean']:>10.2f}{before['p50']:>10.2f}{before['p95']:>10.2f}")
+    print(f"{'schema set up at startup':<26}{after['mean']:>10.2f}{after['p50']:>10.2f}{after['p95']:>10.2f}")
+    print(f"Saved per request: {before['mean'] - after['mean']:.2f} ms mean")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Compare ILIKE scans with the full-text index used by GET /posts/search.
+
+Builds a throwaway SQLite database with --posts rows (1M by default), then
+times the same searches through both paths. Like the endpoint, each search
+counts the matches and reads the first page of 10.
+
+    python benchmarks/bench_search.py --posts 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, func, insert, select
+
+from models import Category, Post, User, db
+from search_index import apply_text_search
+
+TERMS = [("title", "quantum"), ("content", "harbor"), ("content", "zeppelin lantern")]
+
+def build_database(engine, posts, chunk_size=50000):
+    db.metadata.create_all(engine)
+    rng = random.Random(42)
+    vocabulary = [''.join(rng.choices('abcdefghijklmnopqrstuvwxyz', k=rng.randint(4, 10))) for _ in range(20000)]
+    vocabulary += [word for _, term in TERMS for word in term.split()]
+    now = datetime.utcnow()
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"pseudo": "bench", "mail": "bench@mail.com", "password_hash": "x", "role": "user"}])
+        conn.execute(insert(Category), [{"name": "Bench"}])
+        for start in range(0, posts, chunk_size):
+            rows = [
+                {
+                    "title": ' '.join(rng.choices(vocabulary, k=6)),
+                    "content": ' '.join(rng.choices(vocabulary, k=60)),
+                    "created_at": now,
+                    "user_id": 1,
+                    "category_id": 1,
+                }
+                for _ in range(min(chunk_size, posts - start))
+            ]
+            conn.execute(insert(Post), rows)
+
+def ilike_queries(field, term):
+    query = select(Post.id).where(getattr(Post, field).ilike(f"%{term}%"))
+    return [select(func.count()).select_from(query.subquery()), query.limit(10)]
+
+def fts_queries(engine, field, term):
+    query, rank = apply_text_search(select(Post.id), engine, **{field: term})
+    return [select(func.count()).select_from(query.subquery()), query.order_by(rank).limit(10)]
+
+def timed(engine, queries, repeat):
+    timings = []
+    with engine.connect() as conn:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for query in queries:
+                conn.execute(query).fetchall()
+            timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--posts', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        start = time.perf_counter()
+        build_database(engine, args.posts)
+        print(f"Inserted {args.posts} posts (with index) in {time.perf_counter() - start:.1f}s")
+
+        print(f"{'search':<28}{'ilike ms':>12}{'fts ms':>12}{'speedup':>10}")
+        for field, term in TERMS:
+            ilike_ms = timed(engine, ilike_queries(field, term), args.repeat)
+            fts_ms = timed(engine, fts_queries(engine, field, term), args.repeat)
+            print(f"{field + '=' + term:<28}{ilike_ms:>12.2f}{fts_ms:>12.2f}{ilike_ms / fts_ms:>9.0f}x")
+        engine.dispose()
+
+if __name__ == '__main__':
+    main()
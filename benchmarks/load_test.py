@@ -0,0 +1,294 @@
+"""
+HTTP load test for the Blog API.
+
+Seeds a database of the requested size, boots the app under gunicorn, drives
+a weighted mix of read and write requests from concurrent clients, and
+reports requests per second and p50/p95/p99 latency per route.
+
+    python benchmarks/load_test.py --posts 100000 --comments 300000 --duration 60 --concurrency 16 \\
+        --output results.json
+    python benchmarks/load_test.py --skip-seed --database /tmp/blog.db --compare results.json
+
+Results are saved as JSON. With --compare, routes whose p95 grew by more than
+--threshold percent over the baseline file are listed and the exit code is 1.
+"""
+import argparse
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import requests
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SEARCH_WORDS = ["the", "data", "time", "people", "system", "world", "game", "market"]
+CATEGORY_NAMES = ["Technology", "Lifestyle", "Travel", "Food", "Health", "Education", "Science", "Entertainment"]
+
+class Client:
+    """One simulated user: a logged-in HTTP session plus the ids it created."""
+
+    def __init__(self, base_url, mail, password, dataset):
+        self.base_url = base_url
+        self.session = requests.Session()
+        self.mail = mail
+        self.password = password
+        self.dataset = dataset
+        self.own_posts = []
+        self.favorites = set()
+        token = self.session.post(f"{base_url}/login", json={"mail": mail, "password": password}).json()
+        self.session.headers["Authorization"] = f"Bearer {token['access_token']}"
+
+    def random_post(self):
+        return random.randint(1, self.dataset['posts'])
+
+    ### Scenarios: return (route, method, path, json body) ###
+    def list_posts(self):
+        page = random.randint(1, 20)
+        return "GET /posts", "GET", f"/posts?page={page}&limit=10", None
+
+    def list_posts_cursor(self):
+        return "GET /posts?cursor", "GET", "/posts?cursor=&limit=10", None
+
+    def get_post(self):
+        return "GET /posts/<id>", "GET", f"/posts/{self.random_post()}", None
+
+    def search_posts(self):
+        return "GET /posts/search", "GET", f"/posts/search?title={random.choice(SEARCH_WORDS)}", None
+
+    def posts_by_category(self):
+        return "GET /posts/category", "GET", f"/posts/category?category={random.choice(CATEGORY_NAMES)}", None
+
+    def list_categories(self):
+        return "GET /categories", "GET", "/categories", None
+
+    def category_posts(self):
+        return "GET /categories/<id>/posts", "GET", f"/categories/{random.randint(1, len(CATEGORY_NAMES))}/posts", None
+
+    def post_comments(self):
+        return "GET /posts/<id>/comments", "GET", f"/posts/{self.random_post()}/comments", None
+
+    def list_users(self):
+        return "GET /users", "GET", "/users", None
+
+    def my_favorites(self):
+        return "GET /favorites/me", "GET", "/favorites/me", None
+
+    def my_comments(self):
+        return "GET /comments/me", "GET", "/comments/me", None
+
+    def login(self):
+        return "POST /login", "POST", "/login", {"mail": self.mail, "password": self.password}
+
+    def create_post(self):
+        body = {"title": "Load test post", "content": "Load test content " * 20,
+                "category_id": random.randint(1, len(CATEGORY_NAMES))}
+        return "POST /posts", "POST", "/posts", body
+
+    def update_post(self):
+        if not self.own_posts:
+            return self.create_post()
+        return "PUT /posts/<id>", "PUT", f"/posts/{random.choice(self.own_posts)}", {"title": "Updated by load test"}
+
+    def create_comment(self):
+        return "POST /posts/<id>/comments", "POST", f"/posts/{self.random_post()}/comments", {"content": "Load test comment"}
+
+    def toggle_favorite(self):
+        post_id = self.random_post()
+        if post_id in self.favorites:
+            self.favorites.discard(post_id)
+            return "DELETE /favorites/<id>", "DELETE", f"/favorites/{post_id}", None
+        self.favorites.add(post_id)
+        return "POST /favorites/<id>", "POST", f"/favorites/{post_id}", None
+
+    def run(self, scenario):
+        route, method, path, body = scenario()
+        start = time.perf_counter()
+        response = self.session.request(method, self.base_url + path, json=body)
+        elapsed = (time.perf_counter() - start) * 1000
+        if route == "POST /posts" and response.status_code == 201:
+            self.own_posts.append(response.json()["data"]["id"])
+        return route, elapsed, response.status_code
+
+READ_MIX = [
+    ("list_posts", 20), ("list_posts_cursor", 10), ("get_post", 20), ("search_posts", 10),
+    ("posts_by_category", 3), ("list_categories", 5), ("category_posts", 5), ("post_comments", 10),
+    ("list_users", 2), ("my_favorites", 3), ("my_comments", 3),
+]
+WRITE_MIX = [
+    ("login", 2), ("create_post", 2), ("update_post", 1), ("create_comment", 3), ("toggle_favorite", 3),
+]
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def seed(env, args):
+    command = [
+        sys.executable, os.path.join(ROOT, "seed.py"),
+        "--users", str(args.users), "--posts", str(args.posts),
+        "--comments", str(args.comments), "--favorites", str(args.favorites),
+        "--seed", str(args.seed),
+    ]
+    subprocess.run(command, env=env, cwd=ROOT, check=True)
+
+def boot(env, args, port):
+    command = [
+        sys.executable, "-m", "gunicorn", "-w", str(args.workers), "--threads", str(args.threads),
+        "-b", f"127.0.0.1:{port}", "app:app",
+    ]
+    server = subprocess.Popen(command, env=env, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{base_url}/ready", timeout=5).status_code == 200:
+                return server, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("Server did not become ready")
+
+def drive(base_url, args, dataset):
+    mix = [(name, weight) for name, weight in READ_MIX]
+    mix += [(name, weight * args.write_ratio) for name, weight in WRITE_MIX]
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+
+    samples = defaultdict(list)
+    statuses = defaultdict(lambda: defaultdict(int))
+    lock = threading.Lock()
+    stop_at = time.time() + args.warmup + args.duration
+    record_from = time.time() + args.warmup
+
+    def worker(index):
+        user = index % max(1, min(args.users, 50))
+        client = Client(base_url, f"user{user}@example.com", "1234", dataset)
+        while time.time() < stop_at:
+            route, elapsed, status = client.run(getattr(client, random.choices(names, weights)[0]))
+            if time.time() >= record_from:
+                with lock:
+                    samples[route].append(elapsed)
+                    statuses[route][status] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    routes = {}
+    for route, timings in sorted(samples.items()):
+        timings.sort()
+        errors = sum(count for status, count in statuses[route].items() if status >= 500)
+        routes[route] = {
+            "requests": len(timings),
+            "rps": len(timings) / args.duration,
+            "p50_ms": percentile(timings, 0.50),
+            "p95_ms": percentile(timings, 0.95),
+            "p99_ms": percentile(timings, 0.99),
+            "errors": errors,
+            "statuses": {str(status): count for status, count in statuses[route].items()},
+        }
+    total = sum(route["requests"] for route in routes.values())
+    return {"total_requests": total, "total_rps": total / args.duration, "routes": routes}
+
+def print_report(results):
+    print(f"{'route':<30}{'req':>8}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'5xx':>6}")
+    for route, stats in results["routes"].items():
+        print(f"{route:<30}{stats['requests']:>8}{stats['rps']:>9.1f}{stats['p50_ms']:>9.1f}"
+              f"{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}{stats['errors']:>6}")
+    print(f"Total: {results['total_requests']} requests, {results['total_rps']:.1f} req/s")
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = []
+    for route, stats in results["routes"].items():
+        before = baseline["routes"].get(route)
+        if not before or not before["p95_ms"]:
+            continue
+        change = (stats["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+        if change > threshold:
+            regressions.append((route, before["p95_ms"], stats["p95_ms"], change))
+    for route, before, after, change in regressions:
+        print(f"REGRESSION {route}: p95 {before:.1f}ms -> {after:.1f}ms (+{change:.0f}%)")
+    if not regressions:
+        print(f"No p95 regression above {threshold:.0f}% against {baseline_path}")
+    return not regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', help='SQLite file to use (default: temporary file)')
+    parser.add_argument('--skip-seed', action='store_true', help='reuse the data already in --database (pass the sizes it was seeded with)')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--posts', type=int, default=10000)
+    parser.add_argument('--comments', type=int, default=30000)
+    parser.add_argument('--favorites', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=4, help='threads per gunicorn worker')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent clients')
+    parser.add_argument('--duration', type=float, default=30, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=5, help='unmeasured seconds before measuring')
+    parser.add_argument('--write-ratio', type=float, default=1.0, help='multiplier applied to write weights')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', help='baseline JSON file from a previous run')
+    parser.add_argument('--threshold', type=float, default=10, help='allowed p95 growth in percent')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    database = args.database or os.path.join(tmp, 'load.db')
+    env = dict(
+        os.environ,
+        DATABASE_URI=f"sqlite:///{os.path.abspath(database)}",
+        CACHE_DIR=os.path.join(tmp, 'cache'),
+        FLASK_SECRET_KEY=os.getenv('FLASK_SECRET_KEY', 'load-test'),
+        JWT_SECRET_KEY=os.getenv('JWT_SECRET_KEY', 'load-test'),
+        BCRYPT_LOG_ROUNDS=os.getenv('BCRYPT_LOG_ROUNDS', '12'),
+    )
+    if not args.skip_seed:
+        seed(env, args)
+
+    server, base_url = boot(env, args, free_port())
+    try:
+        dataset = {"users": args.users, "posts": args.posts}
+        results = drive(base_url, args, dataset)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+    results["meta"] = {
+        "date": datetime.utcnow().isoformat(),
+        "dataset": {k: getattr(args, k) for k in ("users", "posts", "comments", "favorites", "seed")},
+        "workers": args.workers,
+        "threads": args.threads,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "write_ratio": args.write_ratio,
+    }
+    print_report(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.compare and not compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
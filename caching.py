@@ -0,0 +1,315 @@
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+from functools import wraps
+from urllib.parse import urlencode
+
+from cachelib import FileSystemCache, SimpleCache
+from flask import current_app, has_app_context, make_response, request
+from flask_caching.backends.base import BaseCache
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from compression import apply_encoding, compress, etag_variants, negotiate
+from extensions import cache
+from models import Category, Comment, Favorite, Post, User
+
+class TieredCache(BaseCache):
+    """
+    Small per-process near cache in front of a cache shared by all workers.
+
+    Reads try the near cache first, then the shared backend. Entries found in
+    the shared backend are copied to the near cache for at most
+    `near_timeout` seconds, so a worker never serves data that another
+    worker replaced more than a few seconds ago.
+    """
+
+    def __init__(self, shared, near_threshold=500, near_timeout=5, default_timeout=300):
+        super().__init__(default_timeout=default_timeout)
+        self.shared = shared
+        self.near = SimpleCache(threshold=near_threshold, default_timeout=near_timeout)
+        self.near_timeout = near_timeout
+        self._counters = {'near_hits': 0, 'shared_hits': 0, 'misses': 0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        backend = config.get('CACHE_SHARED_BACKEND', 'filesystem')
+        default_timeout = kwargs.get('default_timeout', 300)
+
+        if backend == 'filesystem':
+            shared = FileSystemCache(
+                config['CACHE_DIR'],
+                threshold=config.get('CACHE_THRESHOLD', 10000),
+                default_timeout=default_timeout
+            )
+        elif backend == 'redis':
+            from cachelib import RedisCache
+            import redis
+
+            shared = RedisCache(
+                host=redis.from_url(config['CACHE_REDIS_URL']),
+                key_prefix=config.get('CACHE_KEY_PREFIX', 'blog:'),
+                default_timeout=default_timeout
+            )
+        elif backend == 'simple':
+            shared = SimpleCache(
+                threshold=config.get('CACHE_THRESHOLD', 10000),
+                default_timeout=default_timeout
+            )
+        else:
+            raise ValueError(f"Unknown CACHE_SHARED_BACKEND: {backend}")
+
+        return cls(
+            shared,
+            near_threshold=config.get('CACHE_NEAR_THRESHOLD', 500),
+            near_timeout=config.get('CACHE_NEAR_TIMEOUT', 5),
+            default_timeout=default_timeout
+        )
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _near_timeout(self, timeout):
+        timeout = self._normalize_timeout(timeout)
+        if timeout == 0:
+            return self.near_timeout
+        return min(timeout, self.near_timeout)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def get(self, key):
+        value = self.near.get(key)
+        if value is not None:
+            self._count('near_hits')
+            return value
+
+        value = self.shared.get(key)
+        if value is None:
+            self._count('misses')
+            return None
+
+        self._count('shared_hits')
+        self.near.set(key, value, timeout=self.near_timeout)
+        return value
+
+    def set(self, key, value, timeout=None):
+        self.near.set(key, value, timeout=self._near_timeout(timeout))
+        return self.shared.set(key, value, timeout=timeout)
+
+    def add(self, key, value, timeout=None):
+        added = self.shared.add(key, value, timeout=timeout)
+        if added:
+            self.near.set(key, value, timeout=self._near_timeout(timeout))
+        return added
+
+    def delete(self, key):
+        self.near.delete(key)
+        return self.shared.delete(key)
+
+    def has(self, key):
+        return self.near.has(key) or self.shared.has(key)
+
+    def clear(self):
+        self.near.clear()
+        return self.shared.clear()
+
+def cache_stats():
+    backend = cache.cache
+    if isinstance(backend, TieredCache):
+        return backend.stats()
+    return {}
+
+### Tags ###
+# Every tag has a version stored in the shared backend. Cached responses are
+# keyed on the versions of their tags, so bumping a version makes all entries
+# of that tag unreachable in every worker, near caches included.
+# Versions are timestamps rather than counters: a tag evicted from the cache
+# comes back with a new value instead of restarting at a value already used.
+
+def _tag_store():
+    backend = cache.cache
+    if isinstance(backend, TieredCache):
+        return backend.shared
+    return backend
+
+def tag_versions(tags):
+    store = _tag_store()
+    keys = [f"tag:{tag}" for tag in tags]
+    versions = dict(zip(tags, store.get_many(*keys)))
+    for tag, key in zip(tags, keys):
+        if versions[tag] is None:
+            store.add(key, time.time_ns(), timeout=0)
+            versions[tag] = store.get(key)
+    return versions
+
+def invalidate_tags(tags):
+    if not tags:
+        return
+    version = time.time_ns()
+    _tag_store().set_many({f"tag:{tag}": version for tag in tags}, timeout=0)
+
+def mark_for_invalidation(session, *tags):
+    """Invalidate `tags` when `session` commits, for writes that bypass the ORM unit of work."""
+    session.info.setdefault('cache_tags', set()).update(tags)
+
+def _changed_values(obj, attr):
+    # Old and new values, so moving a post between categories purges both
+    history = inspect(obj).attrs[attr].history
+    return {value for value in history.sum() if value is not None}
+
+def _tags_for(obj):
+    if isinstance(obj, Post):
+        tags = {'posts:list', 'categories:list', f"post:{obj.id}"}
+        tags.update(f"category:{cat_id}" for cat_id in _changed_values(obj, 'category_id'))
+        return tags
+    if isinstance(obj, (Comment, Favorite)):
+        tags = {f"post:{post_id}" for post_id in _changed_values(obj, 'post_id')}
+        tags.add('comments:list' if isinstance(obj, Comment) else 'favorites:list')
+        return tags
+    if isinstance(obj, Category):
+        return {'posts:list', 'categories:list', f"category:{obj.id}"}
+    if isinstance(obj, User):
+        return {'users:list'}
+    return set()
+
+@event.listens_for(Session, 'after_flush')
+def _collect_cache_tags(session, flush_context):
+    tags = session.info.setdefault('cache_tags', set())
+    for obj in session.new | session.deleted:
+        tags.update(_tags_for(obj))
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            tags.update(_tags_for(obj))
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_cache_tags(session):
+    tags = session.info.pop('cache_tags', None)
+    if tags and has_app_context():
+        try:
+            invalidate_tags(tags)
+        except Exception:
+            current_app.logger.exception('Cache invalidation failed')
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_cache_tags(session):
+    session.info.pop('cache_tags', None)
+
+### Response cache ###
+def _response_digest(versions):
+    args = urlencode(sorted(request.args.items(multi=True)))
+    tags = ','.join(f"{tag}={version}" for tag, version in sorted(versions.items()))
+    return hashlib.sha1(f"{request.path}?{args}#{tags}".encode('utf-8')).hexdigest()
+
+def _last_modified(versions):
+    # Tag versions are the time_ns of the last commit touching the entity
+    if not versions:
+        return None
+    return datetime.fromtimestamp(max(versions.values()) // 1_000_000_000, timezone.utc)
+
+def _client_etag(etag):
+    """The validator of the client's copy when that copy is still current, else None."""
+    # Only an ETag the view produced proves the copy is current: `*` would
+    # also match 400/404 responses, and Last-Modified has one-second
+    # resolution, so a second commit within the same second keeps the same date
+    if request.if_none_match.star_tag:
+        return None
+    for variant in etag_variants(etag):
+        if request.if_none_match.contains(variant):
+            return variant
+    return None
+
+def _set_validators(response, etag, last_modified):
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # Clients may keep the body but must revalidate it before reuse
+    response.cache_control.no_cache = True
+
+def _resolve_tags(tags, view_args):
+    resolved = []
+    for tag in tags:
+        if callable(tag):
+            resolved.extend(tag(**view_args))
+        else:
+            resolved.append(tag.format(**view_args))
+    return resolved
+
+def cached_response(timeout=None, tags=()):
+    """
+    Cache the body of successful GET responses, keyed on path and query string.
+
+    `tags` name the entities the response is built from. They are format
+    strings filled with the view arguments, e.g. 'post:{post_id}', or
+    callables taking the view arguments and returning more tags (tags that
+    depend on the query string). Any commit touching one of those entities
+    invalidates the cached response.
+    Only 200 responses are stored; errors always go through the view.
+
+    The same versions make a strong ETag and a Last-Modified date. A
+    matching `If-None-Match` is answered with a 304 before the
+    cache or the view is consulted. Compressed bodies are cached next to the
+    plain one (COMPRESS_CACHE), so hits are not compressed again.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                versions = tag_versions(_resolve_tags(tags, kwargs))
+                etag = _response_digest(versions)
+                last_modified = _last_modified(versions)
+            except Exception:
+                current_app.logger.exception('Response cache read failed')
+                return view(*args, **kwargs)
+
+            current = _client_etag(etag)
+            if current:
+                response = current_app.response_class(status=304)
+                _set_validators(response, current, last_modified)
+                # A 304 carries the Vary of the response it stands for
+                if current != etag:
+                    response.vary.add('Accept-Encoding')
+                return response
+
+            key = f"response:{etag}"
+            try:
+                entry = cache.get(key)
+            except Exception:
+                current_app.logger.exception('Response cache read failed')
+                entry = None
+
+            if entry is not None:
+                body, mimetype, encoded = entry
+                response = current_app.response_class(body, status=200, mimetype=mimetype)
+                response.headers['X-Cache'] = 'HIT'
+                store = False
+            else:
+                response = make_response(view(*args, **kwargs))
+                response.headers['X-Cache'] = 'MISS'
+                if response.status_code != 200:
+                    return response
+                body, encoded = response.get_data(), {}
+                store = True
+            _set_validators(response, etag, last_modified)
+
+            config = current_app.config
+            encoding = negotiate(response, config) if config.get('COMPRESS_CACHE', True) else None
+            if encoding:
+                # Compressed once per body and encoding, then served from the cache
+                if encoding not in encoded:
+                    encoded[encoding] = compress(body, encoding, config)
+                    store = True
+                apply_encoding(response, encoding, encoded[encoding])
+
+            if store:
+                try:
+                    cache.set(key, (body, response.mimetype, encoded), timeout=timeout)
+                except Exception:
+                    current_app.logger.exception('Response cache write failed')
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,66 @@
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Responses are compressed when the client accepts it and the body is at
+# least COMPRESS_MIN_SIZE bytes. Brotli is preferred when installed.
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/html', 'text/plain')
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+def compress(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config.get('COMPRESS_BR_QUALITY', 5))
+    return gzip.compress(data, compresslevel=config.get('COMPRESS_LEVEL', 6), mtime=0)
+
+def etag_variants(etag):
+    """The ETag of the identity body and of each encoded body."""
+    return [etag] + [f"{etag}-{encoding}" for encoding in ENCODINGS]
+
+def compressible(response, config):
+    min_size = config.get('COMPRESS_MIN_SIZE', 1024)
+    return (
+        min_size >= 0
+        and response.status_code == 200
+        and response.mimetype in COMPRESSIBLE_MIMETYPES
+        and 'Content-Encoding' not in response.headers
+        and not response.direct_passthrough
+        and not response.is_streamed
+        and response.content_length is not None
+        and response.content_length >= min_size
+    )
+
+def negotiate(response, config):
+    """
+    Encoding to send `response` with, or None to send it as is.
+
+    A compressible response varies on Accept-Encoding even when it is sent
+    as is, so shared caches do not hand it to clients that asked otherwise.
+    """
+    if not compressible(response, config):
+        return None
+    response.vary.add('Accept-Encoding')
+    return request.accept_encodings.best_match(ENCODINGS)
+
+def apply_encoding(response, encoding, data):
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # A strong ETag identifies the exact bytes sent
+        response.set_etag(f"{etag}-{encoding}")
+
+def init_compression(app):
+
+    @app.after_request
+    def compress_response(response):
+        encoding = negotiate(response, app.config)
+        if encoding:
+            apply_encoding(response, encoding, compress(response.get_data(), encoding, app.config))
+        return response
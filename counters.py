@@ -0,0 +1,79 @@
+from collections import Counter
+
+from sqlalchemy import bindparam, event, func, or_, select, update
+from sqlalchemy.orm import Session, object_session
+
+from models import Comment, Favorite, Post
+
+# post.comment_count and post.favorite_count are kept in step with the
+# comment and favorite rows. ORM inserts and deletes (cascades included)
+# are tallied per post during a flush and applied at its end as atomic
+# `count = count + n` UPDATEs in the same transaction. Core bulk inserts
+# bypass the mapper events and call add_to_counters themselves.
+
+COUNTERS = {Comment: 'comment_count', Favorite: 'favorite_count'}
+
+def add_to_counters(conn, counter, deltas):
+    """Add `deltas` ({post_id: n}) to the `counter` column of those posts."""
+    deltas = {post_id: delta for post_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    post = Post.__table__
+    conn.execute(
+        update(post)
+        .where(post.c.id == bindparam('target_id'))
+        .values({counter: post.c[counter] + bindparam('delta')}),
+        [{'target_id': post_id, 'delta': delta} for post_id, delta in deltas.items()]
+    )
+
+def count_by_post(rows):
+    """{post_id: number of rows} of inserted comment or favorite rows."""
+    return Counter(row['post_id'] for row in rows)
+
+def _tally(target, delta):
+    deltas = object_session(target).info.setdefault('counter_deltas', {})
+    deltas.setdefault(COUNTERS[type(target)], Counter())[target.post_id] += delta
+
+for _model in COUNTERS:
+    event.listen(_model, 'after_insert', lambda mapper, conn, target: _tally(target, 1))
+    event.listen(_model, 'after_delete', lambda mapper, conn, target: _tally(target, -1))
+
+@event.listens_for(Session, 'after_flush')
+def _apply_counter_deltas(session, flush_context):
+    pending = session.info.pop('counter_deltas', None)
+    if not pending:
+        return
+    # Rows cascaded from a deleted post leave nothing to update
+    deleted = {obj.id for obj in session.deleted if isinstance(obj, Post)}
+    conn = session.connection()
+    for counter, deltas in pending.items():
+        add_to_counters(conn, counter, {post_id: n for post_id, n in deltas.items() if post_id not in deleted})
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_counter_deltas(session):
+    session.info.pop('counter_deltas', None)
+
+def recount_post_counters(conn, batch_size=1000):
+    """Recompute the counters of every post from the rows; return how many posts were off."""
+    post = Post.__table__
+    counts = {
+        counter: select(func.count()).select_from(model.__table__)
+        .where(model.__table__.c.post_id == post.c.id)
+        .scalar_subquery()
+        for model, counter in COUNTERS.items()
+    }
+    # One id range per statement keeps each UPDATE, and its locks, short
+    statement = (
+        update(post)
+        .where(
+            post.c.id > bindparam('low'),
+            post.c.id <= bindparam('high'),
+            or_(*(post.c[counter] != count for counter, count in counts.items()))
+        )
+        .values(counts)
+    )
+    last_id = conn.execute(select(func.max(post.c.id))).scalar() or 0
+    fixed = 0
+    for low in range(0, last_id, batch_size):
+        fixed += conn.execute(statement, {'low': low, 'high': low + batch_size}).rowcount
+    return fixed
@@ -0,0 +1,5 @@
+from marshmallow import Schema, fields, validate
+
+class CommentCreateDTO(Schema):
+    post_id = fields.Integer(required=True, strict=True)
+    content = fields.String(required=True, validate=validate.Length(min=1, max=300))
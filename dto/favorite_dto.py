@@ -0,0 +1,4 @@
+from marshmallow import Schema, fields
+
+class FavoriteCreateDTO(Schema):
+    post_id = fields.Integer(required=True, strict=True)
@@ -0,0 +1,6 @@
+from marshmallow import Schema, fields, validate
+
+class PostCreateDTO(Schema):
+    title = fields.String(required=True, validate=validate.Length(min=1, max=100))
+    content = fields.String(required=True, validate=validate.Length(min=1))
+    category_id = fields.Integer(required=True, strict=True)
@@ -0,0 +1,29 @@
+from flask import request
+from sqlalchemy.orm import load_only
+
+# Sparse fieldsets: `?fields=id,title,created_at` narrows both the columns
+# selected for a listing and the keys of each serialized item.
+
+class InvalidFields(ValueError):
+    def __init__(self, unknown, allowed):
+        super().__init__(unknown)
+        self.unknown = unknown
+        self.allowed = allowed
+
+def requested_fields(model):
+    """Fields asked for with ?fields=, in the order of model.FIELDS, or None for all of them."""
+    value = request.args.get('fields')
+    if value is None:
+        return None
+    names = {name.strip() for name in value.split(',')} - {''}
+    unknown = sorted(names - set(model.FIELDS))
+    if not names or unknown:
+        raise InvalidFields(unknown, list(model.FIELDS))
+    return [field for field in model.FIELDS if field in names]
+
+def load_fields(query, model, fields, *required):
+    """Select only `fields`, the primary key and the `required` columns (ordering, cursors)."""
+    if fields is None:
+        return query
+    names = dict.fromkeys(('id', *required, *fields))
+    return query.options(load_only(*(getattr(model, name) for name in names)))
@@ -0,0 +1,15 @@
+import os
+import shutil
+
+# Prometheus multiprocess mode: each worker writes its metrics to this
+# directory and /metrics aggregates them across workers.
+def on_starting(server):
+    directory = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
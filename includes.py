@@ -0,0 +1,57 @@
+from flask import request
+from sqlalchemy.orm import joinedload, undefer
+
+from models import Post, User
+
+# Related data embedded in post responses: `?include=author,comment_count`.
+# Relations are joined into the page query and counts are the denormalized
+# post columns, so including them adds no query whatever the page size.
+
+INCLUDES = ('author', 'category', 'comment_count', 'favorite_count')
+
+# Commits to these entities change the embedded data
+INCLUDE_TAGS = {
+    'author': 'users:list',
+    'category': 'categories:list',
+    'comment_count': 'comments:list',
+    'favorite_count': 'favorites:list',
+}
+
+class InvalidInclude(ValueError):
+    def __init__(self, unknown, allowed):
+        super().__init__(unknown)
+        self.unknown = unknown
+        self.allowed = allowed
+
+def requested_includes():
+    """Relations asked for with ?include=, in the order of INCLUDES."""
+    value = request.args.get('include')
+    if value is None:
+        return ()
+    names = {name.strip() for name in value.split(',')} - {''}
+    unknown = sorted(names - set(INCLUDES))
+    if not names or unknown:
+        raise InvalidInclude(unknown, list(INCLUDES))
+    return tuple(name for name in INCLUDES if name in names)
+
+def include_tags(**view_args):
+    """Cache tags of the included relations, for cached_response."""
+    try:
+        return [INCLUDE_TAGS[name] for name in requested_includes()]
+    except InvalidInclude:
+        # The view answers with a 400, which is never cached
+        return []
+
+def load_includes(query, include):
+    """Load the relations in `include` with the posts of `query`."""
+    options = []
+    if 'author' in include:
+        options.append(joinedload(Post.author).load_only(User.id, User.pseudo))
+    if 'category' in include:
+        options.append(joinedload(Post.category))
+    # Also load the counters when ?fields= narrowed the columns
+    if 'comment_count' in include:
+        options.append(undefer(Post.comment_count))
+    if 'favorite_count' in include:
+        options.append(undefer(Post.favorite_count))
+    return query.options(*options) if options else query
@@ -0,0 +1,59 @@
+import decimal
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # standard library json
+    orjson = None
+
+# Models hand datetimes to the provider as is: both providers write them in
+# ISO 8601, orjson natively and without a Python call per value.
+
+class IsoJSONProvider(DefaultJSONProvider):
+    """Flask's provider, with ISO 8601 dates instead of HTTP dates."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, date):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
+
+def _orjson_default(o):
+    if isinstance(o, decimal.Decimal):
+        return str(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+class OrjsonProvider(IsoJSONProvider):
+    """
+    Serializes with orjson. Keys keep their insertion order and non-ASCII
+    text is written as UTF-8. Options orjson does not support (e.g. `cls`)
+    fall back to the standard library.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+        if self._app.debug:
+            option |= orjson.OPT_INDENT_2
+        # Bytes straight into the response, no intermediate str
+        return self._app.response_class(
+            orjson.dumps(obj, default=_orjson_default, option=option),
+            mimetype=self.mimetype
+        )
+
+def json_provider_class():
+    return OrjsonProvider if orjson is not None else IsoJSONProvider
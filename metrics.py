@@ -0,0 +1,91 @@
+import os
+import time
+
+from flask import Response, g, has_request_context, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+
+from sql_timing import on_statement
+
+# Under gunicorn every worker writes its samples to PROMETHEUS_MULTIPROC_DIR
+# and /metrics aggregates all of them (see gunicorn.conf.py).
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency',
+    ['method', 'endpoint'], buckets=LATENCY_BUCKETS
+)
+REQUESTS = Counter(
+    'http_requests_total', 'Requests by status code',
+    ['method', 'endpoint', 'status']
+)
+IN_FLIGHT = Gauge(
+    'http_requests_in_flight', 'Requests being served',
+    multiprocess_mode='livesum'
+)
+SQL_QUERIES = Histogram(
+    'http_request_sql_queries', 'SQL statements run per request',
+    ['endpoint'], buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100, 250)
+)
+SQL_DURATION = Histogram(
+    'http_request_sql_duration_seconds', 'Time spent in SQL per request',
+    ['endpoint'], buckets=LATENCY_BUCKETS
+)
+
+def _endpoint():
+    # The route template keeps label cardinality bounded (/posts/<int:post_id>)
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+@on_statement
+def _record_statement(conn, cursor, statement, parameters, context, executemany, elapsed):
+    if has_request_context() and 'metrics_start' in g:
+        g.sql_queries += 1
+        g.sql_duration += elapsed
+
+def _registry():
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+def init_metrics(app):
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_start = time.perf_counter()
+        g.sql_queries = 0
+        g.sql_duration = 0.0
+        IN_FLIGHT.inc()
+
+    @app.after_request
+    def record_request_metrics(response):
+        if 'metrics_start' in g:
+            endpoint = _endpoint()
+            REQUEST_LATENCY.labels(request.method, endpoint).observe(time.perf_counter() - g.metrics_start)
+            REQUESTS.labels(request.method, endpoint, str(response.status_code)).inc()
+            SQL_QUERIES.labels(endpoint).observe(g.sql_queries)
+            SQL_DURATION.labels(endpoint).observe(g.sql_duration)
+        return response
+
+    @app.teardown_request
+    def end_request_metrics(exc):
+        if g.pop('metrics_start', None) is not None:
+            IN_FLIGHT.dec()
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        """
+        Prometheus metrics
+        ---
+        tags:
+          - Health
+        produces:
+          - text/plain
+        responses:
+          200:
+            description: Per-route latency histograms, status counts, in-flight requests and SQL statements per request
+        """
+        return Response(generate_latest(_registry()), content_type=CONTENT_TYPE_LATEST)
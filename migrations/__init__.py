@@ -0,0 +1,65 @@
+"""
+Versioned schema migrations.
+
+Each module listed in MIGRATIONS has a `description` and an
+`upgrade(conn)` function. Applied versions are recorded in the
+`schema_version` table, and every migration runs in its own transaction
+together with its version row, so an interrupted upgrade resumes where it
+stopped. Migrations must be idempotent: databases created by the old
+`db.create_all()` already have some of the objects they add.
+"""
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, insert, inspect, select
+
+from migrations import (
+    m0001_initial_schema, m0002_post_search_index, m0003_hot_indexes, m0004_post_excerpt, m0005_post_counters,
+    m0006_comment_post_created_at_index
+)
+
+MIGRATIONS = [
+    (1, m0001_initial_schema),
+    (2, m0002_post_search_index),
+    (3, m0003_hot_indexes),
+    (4, m0004_post_excerpt),
+    (5, m0005_post_counters),
+    (6, m0006_comment_post_created_at_index),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+schema_version = Table(
+    'schema_version',
+    MetaData(),
+    Column('version', Integer, primary_key=True),
+    Column('description', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+def current_version(engine):
+    if not inspect(engine).has_table('schema_version'):
+        return 0
+    with engine.connect() as conn:
+        versions = conn.execute(select(schema_version.c.version)).scalars().all()
+    return max(versions, default=0)
+
+def is_up_to_date(engine):
+    return current_version(engine) >= LATEST_VERSION
+
+def upgrade(engine, target=LATEST_VERSION):
+    """Apply the pending migrations up to `target` and return the versions applied."""
+    schema_version.create(engine, checkfirst=True)
+    version = current_version(engine)
+    applied = []
+    for number, migration in MIGRATIONS:
+        if number <= version or number > target:
+            continue
+        with engine.begin() as conn:
+            migration.upgrade(conn)
+            conn.execute(insert(schema_version).values(
+                version=number,
+                description=migration.description,
+                applied_at=datetime.utcnow()
+            ))
+        applied.append(number)
+    return applied
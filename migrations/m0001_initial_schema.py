@@ -0,0 +1,7 @@
+from models import db
+
+description = "Create the application tables"
+
+def upgrade(conn):
+    # No-op for tables created earlier by db.create_all()
+    db.metadata.create_all(conn)
@@ -0,0 +1,6 @@
+from search_index import rebuild_search_index
+
+description = "Full-text index on post title and content"
+
+def upgrade(conn):
+    rebuild_search_index(conn)
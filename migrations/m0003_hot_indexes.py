@@ -0,0 +1,22 @@
+from sqlalchemy import text
+
+description = "Indexes on post/comment/favorite foreign keys and post.created_at"
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_post_created_at ON post (created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_post_user_id ON post (user_id)",
+    "CREATE INDEX IF NOT EXISTS ix_post_category_id ON post (category_id)",
+    "CREATE INDEX IF NOT EXISTS ix_comment_post_id ON comment (post_id)",
+    "CREATE INDEX IF NOT EXISTS ix_comment_user_id ON comment (user_id)",
+    "CREATE INDEX IF NOT EXISTS ix_favorite_post_id ON favorite (post_id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_favorite_user_post ON favorite (user_id, post_id)",
+]
+
+def upgrade(conn):
+    # The unique index cannot be built while duplicates exist: keep the oldest row
+    conn.execute(text(
+        "DELETE FROM favorite WHERE id NOT IN "
+        "(SELECT MIN(id) FROM favorite GROUP BY user_id, post_id)"
+    ))
+    for statement in INDEXES:
+        conn.execute(text(statement))
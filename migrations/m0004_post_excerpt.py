@@ -0,0 +1,27 @@
+from sqlalchemy import inspect, text
+
+from models import EXCERPT_LENGTH, make_excerpt
+
+description = "post.excerpt, the shortened content sent by post listings"
+
+BATCH_SIZE = 1000
+
+def upgrade(conn):
+    columns = {column['name'] for column in inspect(conn).get_columns('post')}
+    if 'excerpt' not in columns:
+        conn.execute(text(
+            f"ALTER TABLE post ADD COLUMN excerpt VARCHAR({EXCERPT_LENGTH + 1}) NOT NULL DEFAULT ''"
+        ))
+
+    # Backfill in id order, one batch of contents in memory at a time
+    update = text("UPDATE post SET excerpt = :excerpt WHERE id = :post_id")
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            text("SELECT id, content FROM post WHERE id > :last_id ORDER BY id LIMIT :limit"),
+            {'last_id': last_id, 'limit': BATCH_SIZE}
+        ).all()
+        if not rows:
+            break
+        conn.execute(update, [{'excerpt': make_excerpt(content), 'post_id': post_id} for post_id, content in rows])
+        last_id = rows[-1][0]
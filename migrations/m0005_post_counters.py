@@ -0,0 +1,12 @@
+from sqlalchemy import inspect, text
+
+from counters import recount_post_counters
+
+description = "post.comment_count and post.favorite_count, denormalized counters"
+
+def upgrade(conn):
+    columns = {column['name'] for column in inspect(conn).get_columns('post')}
+    for counter in ('comment_count', 'favorite_count'):
+        if counter not in columns:
+            conn.execute(text(f"ALTER TABLE post ADD COLUMN {counter} INTEGER NOT NULL DEFAULT 0"))
+    recount_post_counters(conn)
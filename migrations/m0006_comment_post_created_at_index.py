@@ -0,0 +1,10 @@
+from sqlalchemy import text
+
+description = "Index on comment (post_id, created_at) for the paginated comments of a post"
+
+def upgrade(conn):
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_comment_post_id_created_at ON comment (post_id, created_at)"
+    ))
+    # Its leading column covers every lookup the single-column index served
+    conn.execute(text("DROP INDEX IF EXISTS ix_comment_post_id"))
@@ -1,9 +1,19 @@
 from flask_sqlalchemy import SQLAlchemy
-from flask_bcrypt import Bcrypt
+from sqlalchemy.orm import validates
 from datetime import datetime
+import passwords
 
 db = SQLAlchemy()
-bcrypt = Bcrypt()
+
+EXCERPT_LENGTH = 200
+
+def make_excerpt(content):
+    """First EXCERPT_LENGTH characters of `content`, cut at a word boundary, with an ellipsis if shortened."""
+    text = " ".join((content or "").split())
+    if len(text) <= EXCERPT_LENGTH:
+        return text
+    cut = text[:EXCERPT_LENGTH].rsplit(" ", 1)[0] or text[:EXCERPT_LENGTH]
+    return cut + "\u2026"
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -16,58 +26,73 @@ class User(db.Model):
     comments = db.relationship("Comment",backref="user",cascade="all, delete-orphan",lazy=True)
     favorites = db.relationship("Favorite",backref="user",cascade="all, delete-orphan",lazy=True)
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "pseudo": self.pseudo,
-            "mail": self.mail,
-            "role": self.role
-        }
+    FIELDS = ("id", "pseudo", "mail", "role")
+
+    def to_dict(self, fields=None):
+        return {field: getattr(self, field) for field in fields or self.FIELDS}
 
     def set_password(self, password):
-        self.password_hash = bcrypt.generate_password_hash(password).decode("utf-8")
+        self.password_hash = passwords.hash_password(password)
 
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return passwords.check_password(password, self.password_hash)
+
+    def password_needs_rehash(self):
+        return passwords.needs_rehash(self.password_hash)
     
 class Post(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     content = db.Column(db.Text, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Listings send this instead of content, so they never read the Text column
+    excerpt = db.Column(db.String(EXCERPT_LENGTH + 1), nullable=False, default="")
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
-    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
-    category_id = db.Column(db.Integer, db.ForeignKey("category.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
+    category_id = db.Column(db.Integer, db.ForeignKey("category.id"), nullable=False, index=True)
 
     comments = db.relationship("Comment",backref="post",cascade="all, delete-orphan",lazy=True)
     favorites = db.relationship("Favorite",backref="post",cascade="all, delete-orphan",lazy=True)
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "title": self.title,
-            "content": self.content,
-            "created_at": self.created_at.isoformat(),
-            "user_id": self.user_id,
-            "category_id": self.category_id
-        }
+    # Denormalized, kept in step with the comment and favorite rows by counters.py
+    comment_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    favorite_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    FIELDS = ("id", "title", "content", "excerpt", "created_at", "user_id", "category_id")
+    LIST_FIELDS = ("id", "title", "excerpt", "created_at", "user_id", "category_id")
+
+    @validates("content")
+    def _set_excerpt(self, key, content):
+        self.excerpt = make_excerpt(content)
+        return content
+
+    def to_dict(self, fields=None, include=()):
+        # Reads only the requested attributes, so columns left out of the query stay unloaded
+        data = {field: getattr(self, field) for field in fields or self.FIELDS}
+        if 'author' in include:
+            data["author"] = self.author.to_dict(("id", "pseudo"))
+        if 'category' in include:
+            data["category"] = self.category.to_dict()
+        for count in ("comment_count", "favorite_count"):
+            if count in include:
+                data[count] = getattr(self, count)
+        return data
 
 class Comment(db.Model):
+    # Also serves the post_id lookups of the foreign key
+    __table_args__ = (db.Index('ix_comment_post_id_created_at', 'post_id', 'created_at'),)
+
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.String(300), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
     post_id = db.Column(db.Integer, db.ForeignKey("post.id"), nullable=False)
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "content": self.content,
-            "created_at": self.created_at.isoformat(),
-            "user_id": self.user_id,
-            "post_id": self.post_id
-        }
+    FIELDS = ("id", "content", "created_at", "user_id", "post_id")
+
+    def to_dict(self, fields=None):
+        return {field: getattr(self, field) for field in fields or self.FIELDS}
 
 
 class Category(db.Model):
@@ -76,17 +101,25 @@ class Category(db.Model):
 
     posts = db.relationship("Post", backref="category", lazy=True)
 
-    def to_dict(self):
-        return {
+    def to_dict(self, post_count=None, post_ids=None):
+        # Post figures come from aggregate queries, never from self.posts
+        data = {
             "id": self.id,
-            "name": self.name,
-            "posts": [post.id for post in self.posts]
+            "name": self.name
         }
+        if post_count is not None:
+            data["post_count"] = post_count
+        if post_ids is not None:
+            data["posts"] = post_ids
+        return data
 
 class Favorite(db.Model):
+    # Unique index rather than constraint so upgraded SQLite databases match fresh ones
+    __table_args__ = (db.Index('uq_favorite_user_post', 'user_id', 'post_id', unique=True),)
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=False)
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=False, index=True)
 
     def to_dict(self):
         return {
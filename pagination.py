@@ -0,0 +1,72 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+# Ids are 64-bit signed integers in every supported database
+MAX_ID = 2**63 - 1
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(created_at, item_id):
+    payload = json.dumps([created_at.isoformat(), item_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Return the (created_at, id) pair stored in an opaque cursor."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        created_at, item_id = datetime.fromisoformat(created_at), int(item_id)
+    except (binascii.Error, UnicodeError, ValueError, TypeError, OverflowError) as e:
+        raise InvalidCursor('Malformed cursor') from e
+    if not 1 <= item_id <= MAX_ID:
+        raise InvalidCursor('Malformed cursor')
+    return created_at, item_id
+
+def keyset_paginate(query, model, limit, cursor=None, descending=True, with_total=False):
+    """
+    Paginate `query` on (created_at, id) without OFFSET.
+
+    The page is read with a range condition on the sort key, so the cost
+    does not depend on how deep the page is. `limit + 1` rows are fetched to
+    know whether a next page exists without counting. The exact total is
+    only computed when `with_total` is set.
+    """
+    total = None
+    if with_total:
+        total = query.order_by(None).count()
+
+    if cursor:
+        created_at, item_id = decode_cursor(cursor)
+        if descending:
+            query = query.filter(or_(
+                model.created_at < created_at,
+                and_(model.created_at == created_at, model.id < item_id)
+            ))
+        else:
+            query = query.filter(or_(
+                model.created_at > created_at,
+                and_(model.created_at == created_at, model.id > item_id)
+            ))
+
+    if descending:
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        query = query.order_by(model.created_at.asc(), model.id.asc())
+
+    rows = query.limit(limit + 1).all()
+    has_next = len(rows) > limit
+    items = rows[:limit]
+
+    pagination = {
+        'limit': limit,
+        'next_cursor': encode_cursor(items[-1].created_at, items[-1].id) if has_next else None,
+        'has_next': has_next
+    }
+    if with_total:
+        pagination['total_items'] = total
+    return items, pagination
@@ -0,0 +1,100 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+import bcrypt
+from flask import current_app
+
+# bcrypt only reads the first 72 bytes; newer releases raise instead of truncating
+MAX_PASSWORD_BYTES = 72
+
+class PasswordPoolBusy(Exception):
+    pass
+
+def _encode(password):
+    return password.encode('utf-8')[:MAX_PASSWORD_BYTES]
+
+### Run in the pool processes ###
+def _hash(password, rounds):
+    return bcrypt.hashpw(_encode(password), bcrypt.gensalt(rounds)).decode('utf-8')
+
+def _check(password, password_hash):
+    try:
+        return bcrypt.checkpw(_encode(password), password_hash.encode('utf-8'))
+    except ValueError:
+        # Not a bcrypt hash (e.g. accounts created through Google login)
+        return False
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a bounded process pool so it does not hold the GIL of
+    the worker serving requests.
+
+    At most PASSWORD_POOL_SIZE hashes run at once and PASSWORD_POOL_QUEUE more
+    may wait; beyond that, or after PASSWORD_POOL_TIMEOUT seconds, calls raise
+    PasswordPoolBusy. A pool size of 0 hashes in the calling thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self._key = None
+
+    def _pool(self, size, queue):
+        # Pools do not survive a fork: build one per process (gunicorn worker)
+        key = (os.getpid(), size, queue)
+        with self._lock:
+            if self._key != key:
+                if self._executor is not None and self._key[0] == key[0]:
+                    self._executor.shutdown(wait=False)
+                # Forking a worker that runs threads copies locks they may hold,
+                # and a pool process can then block on one forever
+                self._executor = ProcessPoolExecutor(
+                    max_workers=size, mp_context=multiprocessing.get_context('forkserver')
+                )
+                self._slots = threading.BoundedSemaphore(size + queue)
+                self._key = key
+            return self._executor, self._slots
+
+    def run(self, fn, *args):
+        config = current_app.config
+        size = config.get('PASSWORD_POOL_SIZE', 2)
+        if size == 0:
+            return fn(*args)
+
+        executor, slots = self._pool(size, config.get('PASSWORD_POOL_QUEUE', 8))
+        if not slots.acquire(blocking=False):
+            raise PasswordPoolBusy()
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            slots.release()
+            raise
+        # The slot is held until the job leaves the pool, not until this call gives up,
+        # so jobs abandoned on timeout still count against PASSWORD_POOL_QUEUE
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=config.get('PASSWORD_POOL_TIMEOUT', 10))
+        except TimeoutError as e:
+            future.cancel()
+            raise PasswordPoolBusy() from e
+
+hasher = PasswordHasher()
+
+def target_rounds():
+    return current_app.config.get('BCRYPT_LOG_ROUNDS', 12)
+
+def hash_password(password):
+    return hasher.run(_hash, password, target_rounds())
+
+def check_password(password, password_hash):
+    return hasher.run(_check, password, password_hash)
+
+def needs_rehash(password_hash):
+    """Tell whether a bcrypt hash ($2b$<cost>$...) uses another cost than the configured one."""
+    try:
+        return int(password_hash.split('$')[2]) != target_rounds()
+    except (IndexError, ValueError):
+        return False
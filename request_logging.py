@@ -0,0 +1,113 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, request
+from flask.logging import default_handler
+
+# Request and error logs are formatted and written by a background thread.
+# Request handlers only put records on a bounded queue: when the sink falls
+# behind, new records are dropped (and counted) instead of piling up in memory
+# or blocking the request.
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; extra fields passed as `extra={'fields': {...}}`."""
+
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class BoundedQueueHandler(QueueHandler):
+    """Queue handler that drops records instead of blocking when the queue is full."""
+
+    def __init__(self, size):
+        super().__init__(queue.Queue(maxsize=size))
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record):
+        # Only resolve what cannot cross threads; JSON formatting happens in the writer
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+class RequestLogging:
+    def __init__(self, app):
+        config = app.config
+        self.handler = BoundedQueueHandler(config.get('LOG_QUEUE_SIZE', 10000))
+        if config.get('LOG_FILE'):
+            sink = logging.FileHandler(config['LOG_FILE'])
+        else:
+            sink = logging.StreamHandler(sys.stdout)
+        sink.setFormatter(JsonFormatter())
+        self.listener = QueueListener(self.handler.queue, sink, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.listener.stop)
+
+    def flush(self):
+        """Wait until the writer has handled every queued record."""
+        self.handler.queue.join()
+
+    def stats(self):
+        return {'queued': self.handler.queue.qsize(), 'dropped': self.handler.dropped}
+
+def init_request_logging(app):
+    state = RequestLogging(app)
+    app.extensions['request_logging'] = state
+
+    app.logger.removeHandler(default_handler)
+    app.logger.addHandler(state.handler)
+    app.logger.setLevel(app.config.get('LOG_LEVEL', 'INFO'))
+    app.logger.propagate = False
+    access_log = app.logger.getChild('access')
+
+    @app.before_request
+    def start_request_log():
+        g.log_start = time.perf_counter()
+
+    @app.after_request
+    def log_request(response):
+        if 'log_start' not in g:
+            return response
+        # Successful requests are the bulk of the traffic: keep only a sample
+        sample_rate = app.config.get('LOG_SAMPLE_RATE_2XX', 1.0) if 200 <= response.status_code < 300 else 1.0
+        if sample_rate < 1.0 and random.random() >= sample_rate:
+            return response
+        level = logging.ERROR if response.status_code >= 500 else logging.INFO
+        access_log.log(level, '%s %s %s', request.method, request.path, response.status_code, extra={'fields': {
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'route': request.url_rule.rule if request.url_rule else None,
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - g.log_start) * 1000, 3),
+            'remote_addr': request.remote_addr,
+            'sample_rate': sample_rate,
+        }})
+        return response
@@ -1,26 +1,78 @@
 from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt
+from sqlalchemy import func, select
 from error_response import error_response
-from models import Category, db
+from models import Category, Post, db
+from caching import cached_response
+from pagination import keyset_paginate, InvalidCursor
+from fieldsets import load_fields, requested_fields
+from includes import include_tags, load_includes, requested_includes
+
+MAX_POSTS_LIMIT = 100
+
+def _latest_post_ids(limit):
+    """Return {category_id: [post ids]} with the `limit` newest posts of each category, in one query."""
+    ranked = select(
+        Post.category_id,
+        Post.id,
+        func.row_number().over(
+            partition_by=Post.category_id,
+            order_by=(Post.created_at.desc(), Post.id.desc())
+        ).label('rank')
+    ).subquery()
+    rows = db.session.execute(
+        select(ranked.c.category_id, ranked.c.id)
+        .where(ranked.c.rank <= limit)
+        .order_by(ranked.c.category_id, ranked.c.rank)
+    )
+    post_ids = {}
+    for category_id, post_id in rows:
+        post_ids.setdefault(category_id, []).append(post_id)
+    return post_ids
 
 def category_routes(app):
 
     ### GET ###
     @app.route('/categories', methods=['GET'])
+    @cached_response(tags=['categories:list'])
     def get_categories():
         """
-        Get all categories
+        Get all categories with their number of posts
         ---
         tags:
           - Categories
+        parameters:
+          - in: query
+            name: posts_limit
+            type: integer
+            required: false
+            default: 0
+            description: Also return the ids of the newest posts of each category (at most 100). Use /categories/{cat_id}/posts for the full list.
         responses:
           200:
             description: List of all categories
+          400:
+            description: Invalid posts_limit
         """
+        posts_limit = request.args.get('posts_limit', 0, type=int)
+        if posts_limit < 0 or posts_limit > MAX_POSTS_LIMIT:
+            return error_response(
+                status=400,
+                code='INVALID_QUERY_PARAM',
+                message=f'posts_limit must be between 0 and {MAX_POSTS_LIMIT}'
+            )
+
         try:
-            categories = Category.query.all()
-        except Exception as e:
-            print(e)
+            rows = (
+                db.session.query(Category, func.count(Post.id))
+                .outerjoin(Post, Post.category_id == Category.id)
+                .group_by(Category.id)
+                .order_by(Category.id)
+                .all()
+            )
+            post_ids = _latest_post_ids(posts_limit) if posts_limit else None
+        except Exception:
+            app.logger.exception("get_categories failed")
             return error_response(
                 status=500,
                 code='INTERNAL_SERVER_ERROR',
@@ -30,10 +82,17 @@ def category_routes(app):
         return jsonify({
             'status': 'success',
             'message': 'Categories successfully retrieved',
-            'data': [cat.to_dict() for cat in categories]
+            'data': [
+                cat.to_dict(
+                    post_count=post_count,
+                    post_ids=post_ids.get(cat.id, []) if post_ids is not None else None
+                )
+                for cat, post_count in rows
+            ]
         }), 200
     
     @app.route('/categories/<int:cat_id>', methods=['GET'])
+    @cached_response(tags=['category:{cat_id}'])
     def get_category(cat_id):
         """
         Get a category by its ID
@@ -59,10 +118,93 @@ def category_routes(app):
                 message='Category ID does not exist'
             )
 
+        post_count = db.session.query(func.count(Post.id)).filter(Post.category_id == cat_id).scalar()
+
         return jsonify({
             'status': 'success',
             'message': 'Category successfully retrieved',
-            'data': cat.to_dict()
+            'data': cat.to_dict(post_count=post_count)
+        }), 200
+
+    @app.route('/categories/<int:cat_id>/posts', methods=['GET'])
+    @cached_response(tags=['category:{cat_id}', include_tags])
+    def get_category_posts(cat_id):
+        """
+        Get the posts of a category, newest first, with cursor pagination
+        ---
+        tags:
+          - Categories
+        parameters:
+          - in: path
+            name: cat_id
+            required: true
+            type: integer
+          - in: query
+            name: limit
+            type: integer
+            required: false
+            default: 10
+            description: Posts per page, at most 100
+          - in: query
+            name: cursor
+            type: string
+            required: false
+            description: Opaque cursor from a previous next_cursor
+          - in: query
+            name: fields
+            type: string
+            required: false
+            description: Comma-separated fields to return (id,title,content,excerpt,created_at,user_id,category_id). Default: all but content
+          - in: query
+            name: include
+            type: string
+            required: false
+            description: Comma-separated related data to embed in each post (author,category,comment_count,favorite_count)
+        responses:
+          200:
+            description: Posts successfully retrieved
+          400:
+            description: Invalid limit, cursor, fields or include
+          404:
+            description: Category not found
+        """
+        fields = requested_fields(Post) or Post.LIST_FIELDS
+        include = requested_includes()
+        limit = request.args.get('limit', 10, type=int)
+        if limit < 1 or limit > MAX_POSTS_LIMIT:
+            return error_response(
+                status=400,
+                code='INVALID_QUERY_PARAM',
+                message=f'Limit must be between 1 and {MAX_POSTS_LIMIT}'
+            )
+
+        if not db.session.get(Category, cat_id):
+            return error_response(
+                status=404,
+                code='RESSOURCE_NOT_FOUND',
+                message='Category ID does not exist'
+            )
+
+        try:
+            posts, pagination = keyset_paginate(
+                load_includes(load_fields(Post.query, Post, fields, 'created_at'), include)
+                .filter(Post.category_id == cat_id),
+                Post,
+                limit,
+                cursor=request.args.get('cursor')
+            )
+        except InvalidCursor:
+            return error_response(
+                status=400,
+                code='INVALID_QUERY_PARAM',
+                message='Invalid cursor'
+            )
+
+        return jsonify({
+            'status': 'success',
+            'message': 'Posts successfully retrieved',
+            'data': [post.to_dict(fields, include) for post in posts],
+            'pagination': pagination
         }), 200
 
     @app.route('/categories', methods=['POST'])
@@ -117,8 +259,8 @@ def category_routes(app):
         try:
             db.session.add(category)
             db.session.commit()
-        except Exception as e:
-            print(e)
+        except Exception:
+            app.logger.exception("create_category failed")
             return error_response(
                 status=409,
                 code='STATE_CONFLICT',
@@ -196,8 +338,8 @@ def category_routes(app):
         try:
             category.name = request.json['name']
             db.session.commit()
-        except Exception as e:
-            print(e)
+        except Exception:
+            app.logger.exception("update_category failed")
             return error_response(
                 status=409,
                 code='STATE_CONFLICT',
@@ -254,7 +396,7 @@ def category_routes(app):
                 message='Category ID does not exist'
             )
 
-        if len(category.posts) > 0:
+        if db.session.query(Post.id).filter(Post.category_id == category_id).first() is not None:
             return error_response(
                 status=409,
                 code='STATE_CONFLICT',
@@ -264,8 +406,8 @@ def category_routes(app):
         try:
             db.session.delete(category)
             db.session.commit()
-        except Exception as e:
-            print(e)
+        except Exception:
+            app.logger.exception("delete_category failed")
             return error_response(
                 status=500,
                 code='INTERNAL_SERVER_ERROR',
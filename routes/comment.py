@@ -2,10 +2,57 @@ from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from error_response import error_response
 from models import Comment, Post, db
+from fieldsets import load_fields, requested_fields
+from batch import (
+    batch_created, batch_items, batch_response, bulk_insert, check_references, fetch_by_ids, rejected_batch,
+    requested_ids
+)
+from caching import cached_response, mark_for_invalidation
+from counters import add_to_counters, count_by_post
+from dto.comment_dto import CommentCreateDTO
+from pagination import keyset_paginate, InvalidCursor
+
+DEFAULT_COMMENTS_LIMIT = 20
+MAX_COMMENTS_LIMIT = 100
 
 def comment_routes(app):
 
     ### GET ###
+    @app.route('/comments', methods=['GET'])
+    def get_comments():
+        """
+        Get several comments by id
+        ---
+        tags:
+          - Comments
+        parameters:
+          - in: query
+            name: ids
+            type: string
+            required: true
+            description: Comma-separated comment ids (at most BATCH_MAX_IDS)
+          - in: query
+            name: fields
+            type: string
+            required: false
+            description: Comma-separated fields to return (id,content,created_at,user_id,post_id)
+        responses:
+          200:
+            description: The comments found, in the requested order, and the ids not found in `missing`
+          400:
+            description: Missing or invalid ids, or unknown field
+        """
+        if 'ids' not in request.args:
+            return error_response(status=400,code='MISSING_QUERY_PARAM',message='ids query parameter is required')
+        fields = requested_fields(Comment)
+        ids = requested_ids()
+        try:
+            comments, missing = fetch_by_ids(load_fields(Comment.query, Comment, fields), Comment, ids)
+        except Exception:
+            app.logger.exception("get_comments failed")
+            return error_response(status=500,code='INTERNAL_SERVER_ERROR',message='Internal server error')
+        return batch_response([comment.to_dict(fields) for comment in comments], missing, 'Comments successfully retrieved')
+
     @app.route('/comments/me', methods=['GET'])
     @jwt_required(optional=True)
     def get_comments_user():
@@ -16,9 +63,17 @@ def comment_routes(app):
           - Comments
         security:
           - BearerAuth: []
+        parameters:
+          - in: query
+            name: fields
+            type: string
+            required: false
+            description: Comma-separated fields to return (id,content,created_at,user_id,post_id)
         responses:
           200:
             description: Comments successfully retrieved
+          400:
+            description: Unknown field
           401:
             description: Unauthorized
         """
@@ -26,18 +81,20 @@ def comment_routes(app):
         if current_user_id is None:
             return error_response(status=401,code="UNAUTHORIZED",message="Authentication required")
         current_user_id = int(current_user_id)
+        fields = requested_fields(Comment)
 
-        comments = Comment.query.filter_by(user_id=current_user_id).all()
+        comments = load_fields(Comment.query, Comment, fields).filter_by(user_id=current_user_id).all()
         return jsonify({
             'status': 'success',
             'message': 'Comments successfully retrieved',
-            'data': [comment.to_dict() for comment in comments]
+            'data': [comment.to_dict(fields) for comment in comments]
         }), 200
     
     @app.route('/posts/<int:post_id>/comments', methods=['GET'])
+    @cached_response(tags=['post:{post_id}'])
     def get_comments_post(post_id):
         """
-        Get all comments related to a specific post
+        Get the comments of a post, oldest first, with cursor pagination
         ---
         tags:
           - Comments
@@ -46,28 +103,68 @@ def comment_routes(app):
             in: path
             required: true
             type: integer
+          - in: query
+            name: limit
+            type: integer
+            required: false
+            default: 20
+            description: Comments per page, at most 100
+          - in: query
+            name: cursor
+            type: string
+            required: false
+            description: Opaque cursor from a previous next_cursor
+          - in: query
+            name: fields
+            type: string
+            required: false
+            description: Comma-separated fields to return (id,content,created_at,user_id,post_id)
         responses:
           200:
             description: Comments successfully retrieved
+          400:
+            description: Invalid limit, cursor or fields
           404:
             description: Post not found
           500:
             description: Internal servor error
         """
+        fields = requested_fields(Comment)
+        limit = request.args.get('limit', DEFAULT_COMMENTS_LIMIT, type=int)
+        if limit < 1 or limit > MAX_COMMENTS_LIMIT:
+            return error_response(
+                status=400,
+                code='INVALID_QUERY_PARAM',
+                message=f'Limit must be between 1 and {MAX_COMMENTS_LIMIT}'
+            )
+
         try:
             post = Post.query.get(post_id)
-        except Exception as e:
-            print(e)
+        except Exception:
+            app.logger.exception("get_comments_post failed")
             return error_response(status=500,code='INTERNAL_SERVER_ERROR',message='Internal server error')
         if not post:
             return error_response(status=404,code='RESSOURCE_NOT_FOUND',message='Post ID does not exist')
 
-        comments = Comment.query.filter_by(post_id=post_id).all()
+        # Served by ix_comment_post_id_created_at, whatever the depth of the page
+        try:
+            comments, pagination = keyset_paginate(
+                load_fields(Comment.query, Comment, fields, 'created_at').filter(Comment.post_id == post_id),
+                Comment,
+                limit,
+                cursor=request.args.get('cursor'),
+                descending=False
+            )
+        except InvalidCursor:
+            return error_response(status=400,code='INVALID_QUERY_PARAM',message='Invalid cursor')
+        # The denormalized counter gives the total without a COUNT
+        pagination['total_items'] = post.comment_count
 
         return jsonify({
             'status': 'success',
             'message': 'Comments successfully retrieved',
-            'data': [comment.to_dict() for comment in comments]
+            'data': [comment.to_dict(fields) for comment in comments],
+            'pagination': pagination
         }), 200
 
     
@@ -130,8 +227,8 @@ def comment_routes(app):
         try:
             db.session.add(comment)
             db.session.commit()
-        except Exception as e:
-            print(e)
+        except Exception:
+            app.logger.exception("create_comment failed")
             return error_response(status=500,code='INTERNAL_SERVER_ERROR',message='Internal server error')
 
         return jsonify({
@@ -140,6 +237,72 @@ def comment_routes(app):
             'data': comment.to_dict()
         }), 201
 
+    @app.route('/comments/batch', methods=['POST'])
+    @jwt_required(optional=True)
+    def create_comments_batch():
+        """
+        Create several comments in one transaction
+        ---
+        tags:
+          - Comments
+        security:
+          - BearerAuth: []
+        parameters:
+          - in: body
+            name: body
+            required: true
+            description: Comments to create, at most BATCH_MAX_ITEMS
+            schema:
+              type: array
+              items:
+                type: object
+                required:
+                  - post_id
+                  - content
+                properties:
+                  post_id:
+                    type: integer
+                    example: 1
+                  content:
+                    type: string
+                    example: "Great post!"
+        responses:
+          201:
+            description: All comments created, one result per item in request order
+          400:
+            description: Body is not an array, too many items, or some items are invalid (nothing is created)
+          401:
+            description: Missing token no access
+          500:
+            description: Internal servor error
+        """
+        current_user_id = get_jwt_identity()
+        if current_user_id is None:
+            return error_response(status=401,code='UNAUTHORIZED',message='No authentication token or invalid token')
+        current_user_id=int(current_user_id)
+
+        comments, errors = batch_items(CommentCreateDTO())
+        check_references(comments, errors, 'post_id', Post, 'Post ID does not exist')
+        if errors:
+            return rejected_batch(errors)
+
+        rows = [dict(comment, user_id=current_user_id) for comment in comments]
+        try:
+            created = bulk_insert(Comment, rows, Comment.created_at)
+            add_to_counters(db.session, 'comment_count', count_by_post(rows))
+            mark_for_invalidation(db.session, 'comments:list', *{f"post:{row['post_id']}" for row in rows})
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            app.logger.exception("create_comments_batch failed")
+            return error_response(status=500,code='INTERNAL_SERVER_ERROR',message='Internal server error')
+
+        results = []
+        for index, (row, (comment_id, created_at)) in enumerate(zip(rows, created)):
+            values = dict(row, id=comment_id, created_at=created_at)
+            results.append({'index': index, 'status': 201, 'data': {field: values[field] for field in Comment.FIELDS}})
+        return batch_created(results, 'Comments successfully created')
+
     ### PUT ###
     @app.route('/comments/<int:comment_id>', methods=['PUT'])
     @jwt_required(optional=True)
@@ -200,8 +363,8 @@ def comment_routes(app):
         try:
             comment.content = request.json['content']
             db.session.commit()
-        except Exception as e:
-            print(e)
+        except Exception:
+            app.logger.exception("update_comment failed")
             return error_response(status=500,code='INTERNAL_SERVER_ERROR',message='Internal server error')
 
         return jsonify({
@@ -257,8 +420,8 @@ def comment_routes(app):
         try:
             db.session.delete(comment)
             db.session.commit()
-        except Exception as e:
-            print(e)
+        except Exception:
+            app.logger.exception("delete_comment failed")
             return error_response(status=500,code='INTERNAL_SERVER_ERROR',message='Internal server error')
 
         return jsonify({
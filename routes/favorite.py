@@ -1,7 +1,13 @@
 from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from sqlalchemy.exc import IntegrityError
 from error_response import error_response
+from fieldsets import load_fields, requested_fields
 from models import User, Post, Favorite, db
+from batch import batch_created, batch_items, bulk_insert, check_references, rejected_batch
+from caching import mark_for_invalidation
+from counters import add_to_counters, count_by_post
+from dto.favorite_dto import FavoriteCreateDTO
 
 def favorite_routes(app):
     
@@ -48,9 +54,26 @@ def favorite_routes(app):
             in: path
             required: true
             type: integer
+          - in: query
+            name: page
+            type: integer
+            required: false
+            default: 1
+          - in: query
+            name: limit
+            type: integer
+            required: false
+            default: 50
+          - in: query
+            name: fields
+            type: string
+            required: false
+            description: Comma-separated fields to return (id,pseudo,mail,role)
         responses:
           200:
             description: Users successfully retrieved
+          400:
+            description: Page and limit must be positive integers, or unknown field
           403:
             description: Forbidden
           404:
@@ -60,17 +83,36 @@ def favorite_routes(app):
         if claims.get("role") != "admin":
             return error_response(status=403,code='FORBIDDEN',message='No access')
 
-        post = Post.query.get(post_id)
-        if not post:
-            return error_response(tatus=404,code='RESSOURCE_NOT_FOUND',message='Post ID does not exist')
+        fields = requested_fields(User)
+        page = request.args.get('page', 1, type=int)
+        limit = request.args.get('limit', 50, type=int)
+        if page < 1 or limit < 1:
+            return error_response(status=400,code='INVALID_QUERY_PARAM',message='Page and limit must be positive integers')
+
+        if not db.session.get(Post, post_id):
+            return error_response(status=404,code='RESSOURCE_NOT_FOUND',message='Post ID does not exist')
 
-        favorites = Favorite.query.filter_by(post_id=post_id).all()
-        users = [User.query.get(fav.user_id).to_dict() for fav in favorites]
+        # One join for the page of users, plus the pagination count
+        pagination = (
+            load_fields(User.query, User, fields)
+            .join(Favorite, Favorite.user_id == User.id)
+            .filter(Favorite.post_id == post_id)
+            .order_by(Favorite.id)
+            .paginate(page=page, per_page=limit, error_out=False)
+        )
 
         return jsonify({
             'status': 'success',
             'message': 'Users successfully retrieved',
-            'data': users
+            'data': [user.to_dict(fields) for user in pagination.items],
+            'pagination': {
+                'page': pagination.page,
+                'limit': limit,
+                'total_pages': pagination.pages,
+                'total_items': pagination.total,
+                'has_next': pagination.has_next,
+                'has_prev': pagination.has_prev
+            }
         }), 200
     
     ### POST ###
@@ -133,8 +175,16 @@ def favorite_routes(app):
         try:
             db.session.add(favorite)
             db.session.commit()
-        except Exception as e:
-            print(e)
+        except IntegrityError:
+            # Concurrent request added the same favorite first
+            db.session.rollback()
+            return error_response(
+                status=400,
+                code='STATE_CONFLICT',
+                message='Post already in favorites'
+            )
+        except Exception:
+            app.logger.exception("add_to_favorites failed")
             return error_response(
                 status=500,
                 code='INTERNAL_SERVER_ERROR',
@@ -147,6 +197,104 @@ def favorite_routes(app):
             'data': favorite.to_dict()
         }), 201
 
+    @app.route('/favorites/batch', methods=['POST'])
+    @jwt_required(optional=True)
+    def add_to_favorites_batch():
+        """
+        Add several posts to the user's favorites in one transaction
+        ---
+        tags:
+          - Favorites
+        security:
+          - BearerAuth: []
+        parameters:
+          - in: body
+            name: body
+            required: true
+            description: Posts to add, at most BATCH_MAX_ITEMS
+            schema:
+              type: array
+              items:
+                type: object
+                required:
+                  - post_id
+                properties:
+                  post_id:
+                    type: integer
+                    example: 1
+        responses:
+          201:
+            description: Posts added; items already in favorites get a 400 STATE_CONFLICT result
+          200:
+            description: Every post was already in favorites, nothing added
+          400:
+            description: Body is not an array, too many items, or some items are invalid (nothing is added)
+          401:
+            description: No authentication token or invalid token
+          404:
+            description: User not found
+          500:
+            description: Internal servor error
+        """
+        current_user_id = get_jwt_identity()
+        if current_user_id is None:
+            return error_response(status=401,code='UNAUTHORIZED',message='No authentication token or invalid token')
+        current_user_id = int(current_user_id)
+
+        user = User.query.get(current_user_id)
+        if not user:
+            return error_response(status=404,code='USER_NOT_FOUND',message='User ID does not exist')
+
+        favorites, errors = batch_items(FavoriteCreateDTO())
+        check_references(favorites, errors, 'post_id', Post, 'Post ID does not exist')
+        if errors:
+            return rejected_batch(errors)
+
+        # Posts already in favorites, or repeated in the batch, are reported per item
+        seen = set(db.session.execute(
+            db.select(Favorite.post_id).where(
+                Favorite.user_id == current_user_id,
+                Favorite.post_id.in_({favorite['post_id'] for favorite in favorites})
+            )
+        ).scalars())
+        results, rows, pending = [], [], []
+        for index, favorite in enumerate(favorites):
+            if favorite['post_id'] in seen:
+                results.append({'index': index, 'status': 400, 'code': 'STATE_CONFLICT',
+                                'message': 'Post already in favorites'})
+                continue
+            seen.add(favorite['post_id'])
+            rows.append({'user_id': current_user_id, 'post_id': favorite['post_id']})
+            pending.append({'index': index, 'status': 201})
+            results.append(pending[-1])
+
+        if rows:
+            try:
+                created = bulk_insert(Favorite, rows)
+                add_to_counters(db.session, 'favorite_count', count_by_post(rows))
+                mark_for_invalidation(db.session, 'favorites:list', *{f"post:{row['post_id']}" for row in rows})
+                db.session.commit()
+            except IntegrityError:
+                # Concurrent request added one of the favorites first
+                db.session.rollback()
+                return error_response(
+                    status=400,
+                    code='STATE_CONFLICT',
+                    message='Post already in favorites'
+                )
+            except Exception:
+                db.session.rollback()
+                app.logger.exception("add_to_favorites_batch failed")
+                return error_response(
+                    status=500,
+                    code='INTERNAL_SERVER_ERROR',
+                    message='Internal server error'
+                )
+            for result, row, (favorite_id,) in zip(pending, rows, created):
+                result['data'] = {'id': favorite_id, **row}
+
+        return batch_created(results, 'Posts successfully added to favorites')
+
     ### DELETE ###
     @app.route('/favorites/<int:post_id>', methods=['DELETE'])
     @jwt_required(optional=True)
@@ -180,8 +328,8 @@ def favorite_routes(app):
         try:
             db.session.delete(favorite)
             db.session.commit()
-        except Exception as e:
-            print(e)
+        except Exception:
+            app.logger.exception("delete_favorite failed")
             return error_response(status=500,code='INTERNAL_SERVER_ERROR',message='Internal server error')
 
         return jsonify({
@@ -2,6 +2,7 @@ from flask import request, jsonify, redirect
 from flask_jwt_extended import create_access_token, create_refresh_token,jwt_required, get_jwt_identity
 from error_response import error_response
 from models import User, db
+from passwords import PasswordPoolBusy
 from google.oauth2 import id_token
 from google.auth.transport import requests as google_requests
 from dotenv import load_dotenv
@@ -61,6 +62,15 @@ def login_routes(app):
         if not user.check_password(data["password"]):
             return error_response(status=401,code='INVALID_CREDENTIALS',message='Invalid mail or password')
 
+        # Move the stored hash to the configured bcrypt cost
+        if user.password_needs_rehash():
+            try:
+                user.set_password(data["password"])
+                db.session.commit()
+            except PasswordPoolBusy:
+                # Optional upgrade: the credentials are valid, retry on a later login
+                pass
+
         access_token = create_access_token(
             identity=str(user.id),
             additional_claims={"role": user.role}
@@ -1,15 +1,43 @@
 from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-from models import Post,Category, db
+from models import Post,Category, db, make_excerpt
 from error_response import error_response
+from pagination import keyset_paginate, InvalidCursor
+from search_index import apply_text_search
+from fieldsets import load_fields, requested_fields
+from includes import include_tags, load_includes, requested_includes
+from batch import (
+    batch_created, batch_items, batch_response, bulk_insert, check_references, fetch_by_ids, rejected_batch,
+    requested_ids
+)
+from dto.post_dto import PostCreateDTO
+
+from caching import cached_response, mark_for_invalidation
+
+def _cursor_page(query, limit, fields=None, include=()):
+    try:
+        posts, pagination = keyset_paginate(
+            load_includes(load_fields(query, Post, fields, 'created_at'), include),
+            Post,
+            limit,
+            cursor=request.args.get('cursor'),
+            with_total=request.args.get('total', 'false').lower() in ('1', 'true')
+        )
+    except InvalidCursor:
+        return error_response(status=400, code='INVALID_QUERY_PARAM', message='Invalid cursor')
 
-from extensions import cache
+    return jsonify({
+        'status': 'success',
+        'message': 'Posts successfully retrieved',
+        'data': [post.to_dict(fields, include) for post in posts],
+        'pagination': pagination
+    }), 200
 
 def posts_routes(app):
 
     ### GET POSTS ###
-    @cache.cached(timeout=60, query_string=True)
     @app.route('/posts', methods=['GET'])
+    @cached_response(tags=['posts:list', include_tags])
     def get_posts():
         """
         Get all the posts.
@@ -28,11 +56,49 @@ def posts_routes(app):
             type: integer
             required: false
             default: 10
+          - in: query
+            name: cursor
+            type: string
+            required: false
+            description: Opaque cursor from a previous next_cursor. Switches to keyset pagination (send it empty for the first page).
+          - in: query
+            name: total
+            type: boolean
+            required: false
+            default: false
+            description: In cursor mode, also compute total_items.
+          - in: query
+            name: ids
+            type: string
+            required: false
+            description: Comma-separated post ids (at most BATCH_MAX_IDS). Returns those posts in this order, with the ids not found in `missing`; page, limit and cursor are ignored.
+          - in: query
+            name: fields
+            type: string
+            required: false
+            description: Comma-separated fields to return (id,title,content,excerpt,created_at,user_id,category_id). Default: all but content, or all with ids
+          - in: query
+            name: include
+            type: string
+            required: false
+            description: Comma-separated related data to embed in each post (author,category,comment_count,favorite_count)
         responses:
             200:
                 description: Posts successfully retrieved.
+            400:
+                description: Invalid page, limit, cursor, ids, fields or include
         """
+        fields = requested_fields(Post)
+        include = requested_includes()
+        ids = requested_ids() if 'ids' in request.args else None
         try:
+            if ids is not None:
+                query = load_includes(load_fields(Post.query, Post, fields), include)
+                posts, missing = fetch_by_ids(query, Post, ids)
+                data = [post.to_dict(fields, include) for post in posts]
+                return batch_response(data, missing, 'Posts successfully retrieved')
+
+            fields = fields or Post.LIST_FIELDS
             page = request.args.get('page', 1, type=int)
             limit = request.args.get('limit', 10, type=int)
 
@@ -43,7 +109,11 @@ def posts_routes(app):
                     message='Page and limit must be positive integers'
                 )
 
-            pagination = Post.query.order_by(Post.created_at.desc()).paginate(
+            if 'cursor' in request.args:
+                return _cursor_page(Post.query, limit, fields, include)
+
+            query = load_includes(load_fields(Post.query, Post, fields, 'created_at'), include)
+            pagination = query.order_by(Post.created_at.desc()).paginate(
                 page=page,
                 per_page=limit,
                 error_out=False
@@ -54,7 +124,7 @@ def posts_routes(app):
             return jsonify({
                 'status': 'success',
                 'message': 'Posts successfully retrieved',
-                'data': [post.to_dict() for post in posts],
+                'data': [post.to_dict(fields, include) for post in posts],
                 'pagination': {
                     'page': pagination.page,
                     'limit': limit,
@@ -64,11 +134,12 @@ def posts_routes(app):
                     'has_prev': pagination.has_prev
                 }
             }), 200
-        except Exception as e:
-            print(e)
+        except Exception:
+            app.logger.exception("get_posts failed")
             return error_response(status=500,code='INTERNAL_SERVER_ERROR',message='Internal server error'            )
 
     @app.route('/posts/<int:post_id>', methods=['GET'])
+    @cached_response(tags=['post:{post_id}', include_tags])
     def get_post(post_id):
         """
         Get a post by its ID
@@ -80,13 +151,21 @@ def posts_routes(app):
             in: path
             required: true
             type: integer
+          - in: query
+            name: include
+            type: string
+            required: false
+            description: Comma-separated related data to embed in each post (author,category,comment_count,favorite_count)
         responses:
           200:
             description: Post successfully retrieved
+          400:
+            description: Unknown relation in include
           404:
             description: Post not found
         """
-        post = Post.query.get(post_id)
+        include = requested_includes()
+        post = load_includes(Post.query, include).get(post_id)
         if not post:
             return error_response(
                 status=404,
@@ -97,10 +176,11 @@ def posts_routes(app):
         return jsonify({
             'status': 'success',
             'message': 'Post successfully retrieved',
-            'data': post.to_dict()
+            'data': post.to_dict(include=include)
         }), 200
 
     @app.route('/posts/category', methods=['GET'])
+    @cached_response(tags=['posts:list', include_tags])
     def get_posts_by_category():
         """
         Get all posts filtered by category name
@@ -113,13 +193,25 @@ def posts_routes(app):
             required: true
             type: string
             example: Technology
+          - in: query
+            name: fields
+            type: string
+            required: false
+            description: Comma-separated fields to return (id,title,content,excerpt,created_at,user_id,category_id). Default: all but content
+          - in: query
+            name: include
+            type: string
+            required: false
+            description: Comma-separated related data to embed in each post (author,category,comment_count,favorite_count)
         responses:
           200:
             description: List of posts
           400:
-            description: Missing category query parameter
+            description: Missing category query parameter, unknown field or relation
         """
         category = request.args.get('category')
+        fields = requested_fields(Post) or Post.LIST_FIELDS
+        include = requested_includes()
 
         if not category:
             return error_response(
@@ -130,13 +222,13 @@ def posts_routes(app):
 
         try:
             posts = (
-                Post.query
+                load_includes(load_fields(Post.query, Post, fields), include)
                 .join(Category)
                 .filter(Category.name.ilike(f"%{category}%"))
                 .all()
             )
-        except Exception as e:
-            print(e)
+        except Exception:
+            app.logger.exception("get_posts_by_category failed")
             return error_response(
                 status=500,
                 code='INTERNAL_SERVER_ERROR',
@@ -153,13 +245,17 @@ def posts_routes(app):
         return jsonify({
             'status': 'success',
             'message': 'Posts successfully retrieved',
-            'data': [post.to_dict() for post in posts]
+            'data': [post.to_dict(fields, include) for post in posts]
         }), 200
     
     @app.route('/posts/search', methods=['GET'])
+    @cached_response(tags=['posts:list', include_tags])
     def search_posts():
         """
         Search posts by multiple criteria with pagination
+
+        Title and content words are matched as prefixes through the
+        full-text index and results are ranked by relevance.
         ---
         tags:
           - Posts
@@ -188,14 +284,37 @@ def posts_routes(app):
             name: limit
             type: integer
             default: 10
+          - in: query
+            name: cursor
+            type: string
+            required: false
+            description: Opaque cursor from a previous next_cursor. Switches to keyset pagination (send it empty for the first page).
+          - in: query
+            name: total
+            type: boolean
+            required: false
+            default: false
+            description: In cursor mode, also compute total_items.
+          - in: query
+            name: fields
+            type: string
+            required: false
+            description: Comma-separated fields to return (id,title,content,excerpt,created_at,user_id,category_id). Default: all but content
+          - in: query
+            name: include
+            type: string
+            required: false
+            description: Comma-separated related data to embed in each post (author,category,comment_count,favorite_count)
         responses:
           200:
             description: Paginated list of posts
           400: 
-            description: Page and limit must be positive integers
+            description: Page, limit, cursor, fields or include is invalid
           500:
             description: Internal server error
         """
+        fields = requested_fields(Post) or Post.LIST_FIELDS
+        include = requested_includes()
         try:
             title = request.args.get('title', type=str)
             content = request.args.get('content', type=str)
@@ -210,22 +329,25 @@ def posts_routes(app):
                     code='INVALID_QUERY_PARAM',
                     message='Page and limit must be positive integers'
                 )
-            query = Post.query
-            if title:
-                query = query.filter(Post.title.ilike(f"%{title}%"))
-            if content:
-                query = query.filter(Post.content.ilike(f"%{content}%"))
+            query, rank = apply_text_search(Post.query, db.engine, title=title, content=content)
             if category_name:
                 query = query.join(Category).filter(Category.name.ilike(f"%{category_name}%"))
             if user_id:
                 query = query.filter(Post.user_id == user_id)
 
+            if 'cursor' in request.args:
+                return _cursor_page(query, limit, fields, include)
+
+            if rank is not None:
+                query = query.order_by(rank, Post.id.desc())
+
+            query = load_includes(load_fields(query, Post, fields), include)
             pagination = query.paginate(page=page, per_page=limit, error_out=False)
 
             return jsonify({
                 'status': 'success',
                 'message': 'Posts successfully retrieved',
-                'data': [post.to_dict() for post in pagination.items],
+                'data': [post.to_dict(fields, include) for post in pagination.items],
                 'pagination': {
                     'page': pagination.page,
                     'limit': limit,
@@ -236,8 +358,8 @@ def posts_routes(app):
                 }
             }), 200
 
-        except Exception as e:
-            print(e)
+        except Exception:
+            app.logger.exception("search_posts failed")
             return error_response(status=500,code='INTERNAL_SERVER_ERROR',message='Internal server error')
     
     ### POST ###
@@ -303,11 +425,84 @@ def posts_routes(app):
         try:
             db.session.add(post)
             db.session.commit()
-        except Exception as e:
-            print(e)
+        except Exception:
+            app.logger.exception("create_post failed")
             return error_response(status=500, code='INTERNAL_SERVER_ERROR', message='Internal server error')
 
         return jsonify({'status': 'success','message': 'Post successfully created','data': post.to_dict()}), 201
+
+    @app.route('/posts/batch', methods=['POST'])
+    @jwt_required(optional=True)
+    def create_posts_batch():
+        """
+        Create several posts in one transaction
+        ---
+        tags:
+          - Posts
+        security:
+          - BearerAuth: []
+        parameters:
+          - in: body
+            name: body
+            required: true
+            description: Posts to create, at most BATCH_MAX_ITEMS
+            schema:
+              type: array
+              items:
+                type: object
+                required:
+                  - title
+                  - content
+                  - category_id
+                properties:
+                  title:
+                    type: string
+                    example: "Title post"
+                  content:
+                    type: string
+                    example: "Content"
+                  category_id:
+                    type: integer
+                    example: 1
+        responses:
+          201:
+            description: All posts created, one result per item in request order
+          400:
+            description: Body is not an array, too many items, or some items are invalid (nothing is created)
+          401:
+            description: Missing token no access
+          500:
+            description: Internal server error
+        """
+        current_user_id = get_jwt_identity()
+        if current_user_id is None:
+            return error_response(status=401, code='UNAUTHORIZED', message='No authentication token or invalid token')
+        current_user_id = int(current_user_id)
+
+        posts, errors = batch_items(PostCreateDTO())
+        check_references(posts, errors, 'category_id', Category, 'Category does not exist')
+        if errors:
+            return rejected_batch(errors)
+
+        # Core INSERT: the excerpt and the cache tags normally set by the ORM are set here
+        rows = [dict(post, excerpt=make_excerpt(post['content']), user_id=current_user_id) for post in posts]
+        try:
+            created = bulk_insert(Post, rows, Post.created_at)
+            mark_for_invalidation(
+                db.session, 'posts:list', 'categories:list',
+                *{f"category:{row['category_id']}" for row in rows}
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            app.logger.exception("create_posts_batch failed")
+            return error_response(status=500, code='INTERNAL_SERVER_ERROR', message='Internal server error')
+
+        results = []
+        for index, (row, (post_id, created_at)) in enumerate(zip(rows, created)):
+            values = dict(row, id=post_id, created_at=created_at)
+            results.append({'index': index, 'status': 201, 'data': {field: values[field] for field in Post.FIELDS}})
+        return batch_created(results, 'Posts successfully created')
     
     @app.route('/posts/<int:post_id>', methods=['PUT'])
     @jwt_required()
@@ -361,7 +556,6 @@ def posts_routes(app):
             return error_response(status=404,code='RESSOURCE_NOT_FOUND',message='Post ID does not exist')
         
         if post.user_id != current_user_id:
-          print("cvbn",post.user_id,current_user_id)
           return error_response(status=403,code='FORBIDDEN',message='You are not allowed to modify this post')
 
         if not request.json:
@@ -372,8 +566,8 @@ def posts_routes(app):
             post.content = request.json.get('content', post.content)
             post.category_id = request.json.get('category_id', post.category_id)
             db.session.commit()
-        except Exception as e:
-            print(e)
+        except Exception:
+            app.logger.exception("update_post failed")
             return error_response(status=500,code='INTERNAL_SERVER_ERROR',message='Internal server error')
 
         return jsonify({
@@ -427,8 +621,8 @@ def posts_routes(app):
         try:
             db.session.delete(post)
             db.session.commit()
-        except Exception as e:
-            print(e)
+        except Exception:
+            app.logger.exception("delete_post failed")
             return error_response(status=500,code='INTERNAL_SERVER_ERROR',message='Internal server error')
 
         return jsonify({
@@ -2,8 +2,11 @@ from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from models import User, db
 from error_response import error_response
+from fieldsets import load_fields, requested_fields
+from batch import batch_response, fetch_by_ids, requested_ids
 from dto.user_dto import UserCreateDTO, UserUpdateDTO
 from marshmallow import ValidationError
+from passwords import PasswordPoolBusy
 
 def users_routes(app):
 
@@ -15,6 +18,17 @@ def users_routes(app):
         ---
         tags:
             - Users
+        parameters:
+            - in: query
+              name: fields
+              type: string
+              required: false
+              description: Comma-separated fields to return (id,pseudo,mail,role)
+            - in: query
+              name: ids
+              type: string
+              required: false
+              description: Comma-separated user ids (at most BATCH_MAX_IDS). Returns those users in this order, with the ids not found in `missing`.
         responses:
             200:
                 description: Users successfully retrieved.
@@ -23,17 +37,24 @@ def users_routes(app):
                 properties:
                     message:
                     type: string
+            400:
+                description: Invalid ids or unknown field
         """
+        fields = requested_fields(User)
+        ids = requested_ids() if 'ids' in request.args else None
         try:
-            users = User.query.all()
-        except Exception as e:
-            print(e)
+            if ids is not None:
+                users, missing = fetch_by_ids(load_fields(User.query, User, fields), User, ids)
+                return batch_response([user.to_dict(fields) for user in users], missing, 'Users successfully retrieved')
+            users = load_fields(User.query, User, fields).all()
+        except Exception:
+            app.logger.exception("get_users failed")
             return error_response(500, 'INTERNAL_SERVER_ERROR', 'Internal server error')
 
         return jsonify({
             'status': 'success',
             'message': 'Users successfully retrieved',
-            'data': [user.to_dict() for user in users]
+            'data': [user.to_dict(fields) for user in users]
         }), 200
 
     @app.route('/users/me', methods=['GET'])
@@ -141,8 +162,8 @@ def users_routes(app):
         try:
             db.session.add(user)
             db.session.commit()
-        except Exception as e:
-            print(e)
+        except Exception:
+            app.logger.exception("create_user failed")
             return error_response(status=409,code='DUPLICATE_RESSOURCE',message='Data already exists')
         
         return jsonify({
@@ -216,8 +237,10 @@ def users_routes(app):
             if 'password' in request.json:
                 user.set_password(data['password'])
             db.session.commit()
-        except Exception as e:
-            print(e)
+        except PasswordPoolBusy:
+            raise
+        except Exception:
+            app.logger.exception("update_user failed")
             return error_response(status=404,code='USER_NOT_FOUND',message='User ID does not exist')
 
         return jsonify({
@@ -265,9 +288,9 @@ def users_routes(app):
         try:
             user_to_promote.role = 'admin'
             db.session.commit()
-        except Exception as e:
+        except Exception:
             db.session.rollback()
-            print("Error promoting user:", e)
+            app.logger.exception("make_user_admin failed")
             return error_response(status=500,code='INTERNAl_SERVER_ERROR',message='Internal server error')
 
         return jsonify({
@@ -302,8 +325,8 @@ def users_routes(app):
         try:
             db.session.delete(user)
             db.session.commit()
-        except Exception as e:
-            print(e)
+        except Exception:
+            app.logger.exception("delete_user failed")
             return error_response(status=500,code="INTERNAL_SERVER_ERROR",message="Internal server error")
 
         return jsonify({
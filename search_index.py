@@ -0,0 +1,119 @@
+import re
+
+from sqlalchemy import DDL, column, event, func, inspect, literal_column, table, text
+
+from models import Post
+
+### Schema ###
+# SQLite: FTS5 external-content table over post(title, content), kept in
+# sync by triggers. PostgreSQL: generated tsvector column with a GIN index,
+# title weighted A and content weighted B so each can be searched alone.
+
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS post_fts USING fts5("
+    "title, content, content='post', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS post_fts_ai AFTER INSERT ON post BEGIN "
+    "INSERT INTO post_fts(rowid, title, content) VALUES (new.id, new.title, new.content); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS post_fts_ad AFTER DELETE ON post BEGIN "
+    "INSERT INTO post_fts(post_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS post_fts_au AFTER UPDATE OF title, content ON post BEGIN "
+    "INSERT INTO post_fts(post_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content); "
+    "INSERT INTO post_fts(rowid, title, content) VALUES (new.id, new.title, new.content); "
+    "END",
+]
+
+POSTGRESQL_DDL = [
+    "ALTER TABLE post ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(content, '')), 'B')) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_post_search_vector ON post USING GIN (search_vector)",
+]
+
+for statement in SQLITE_DDL:
+    event.listen(Post.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+for statement in POSTGRESQL_DDL:
+    event.listen(Post.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+event.listen(Post.__table__, 'before_drop', DDL("DROP TABLE IF EXISTS post_fts").execute_if(dialect='sqlite'))
+
+post_fts = table('post_fts', column('rowid'), column('rank'))
+search_vector = literal_column('post.search_vector')
+
+_available = {}
+
+def search_index_available(engine):
+    """Tell whether `engine` has a full-text index for posts (checked once per engine)."""
+    if engine not in _available:
+        inspector = inspect(engine)
+        if engine.dialect.name == 'sqlite':
+            _available[engine] = inspector.has_table('post_fts')
+        elif engine.dialect.name == 'postgresql':
+            columns = [column['name'] for column in inspector.get_columns('post')]
+            _available[engine] = 'search_vector' in columns
+        else:
+            _available[engine] = False
+    return _available[engine]
+
+def rebuild_search_index(conn):
+    """Create the full-text index if missing and fill it from the post table."""
+    if conn.dialect.name == 'sqlite':
+        for statement in SQLITE_DDL:
+            conn.execute(text(statement))
+        conn.execute(text("INSERT INTO post_fts(post_fts) VALUES ('rebuild')"))
+    elif conn.dialect.name == 'postgresql':
+        for statement in POSTGRESQL_DDL:
+            conn.execute(text(statement))
+    _available.pop(conn.engine, None)
+
+def drop_search_triggers(conn):
+    """Stop syncing the SQLite index row by row, for bulk loads followed by rebuild_search_index()."""
+    if conn.dialect.name == 'sqlite':
+        for trigger in ('post_fts_ai', 'post_fts_ad', 'post_fts_au'):
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+
+### Queries ###
+def _words(term):
+    return re.findall(r"\w+", term or "")
+
+def _sqlite_match(title, content):
+    clauses = [f'title : "{word}"*' for word in _words(title)]
+    clauses += [f'content : "{word}"*' for word in _words(content)]
+    return " AND ".join(clauses)
+
+def _postgresql_tsquery(title, content):
+    clauses = [f"{word}:*A" for word in _words(title)]
+    clauses += [f"{word}:*B" for word in _words(content)]
+    return " & ".join(clauses)
+
+def apply_text_search(query, engine, title=None, content=None):
+    """
+    Filter `query` (a Post query or select) on title/content words.
+
+    Each word is matched as a prefix through the full-text index. Returns
+    the filtered query and a relevance expression to order by (best first),
+    or None when the index is missing and the query fell back to ILIKE.
+    """
+    if not title and not content:
+        return query, None
+
+    if search_index_available(engine) and (_words(title) or _words(content)):
+        if engine.dialect.name == 'sqlite':
+            query = (
+                query
+                .join(post_fts, post_fts.c.rowid == Post.id)
+                .filter(literal_column('post_fts').op('MATCH')(_sqlite_match(title, content)))
+            )
+            # FTS5 rank is bm25(): lower is more relevant
+            return query, post_fts.c.rank.asc()
+
+        tsquery = func.to_tsquery('simple', _postgresql_tsquery(title, content))
+        query = query.filter(search_vector.op('@@')(tsquery))
+        return query, func.ts_rank(search_vector, tsquery).desc()
+
+    if title:
+        query = query.filter(Post.title.ilike(f"%{title}%"))
+    if content:
+        query = query.filter(Post.content.ilike(f"%{content}%"))
+    return query, None
@@ -1,99 +1,150 @@
+"""
+Seed the database with fake data.
+
+    python seed.py                                   # small demo dataset
+    python seed.py --users 100000 --posts 1000000 --comments 5000000 --favorites 2000000 --seed 42
+
+The database is dropped and recreated. Rows are generated in chunks and
+written with bulk INSERTs, and every generated user shares one password
+(1234) hashed once, so large datasets take minutes rather than hours.
+Alice (alice@mail.com / 1234) and admin (admin@mail.com / admin) always exist.
+"""
 from app import app
-from models import db, User, Post, Comment, Category, Favorite
+from models import db, User, Post, Comment, Category, Favorite, make_excerpt
+from extensions import cache
+from sqlalchemy import insert
 from faker import Faker
+from datetime import datetime, timedelta
+from search_index import drop_search_triggers, rebuild_search_index
+from counters import recount_post_counters
+import argparse
+import passwords
+import migrations
 import random
+import time
+
+CATEGORY_NAMES = [
+    "Technology", "Lifestyle", "Travel", "Food",
+    "Health", "Education", "Science", "Entertainment"
+]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=30, help='generated users, besides Alice and admin')
+    parser.add_argument('--posts', type=int, default=100)
+    parser.add_argument('--comments', type=int, default=200)
+    parser.add_argument('--favorites', type=int, default=150)
+    parser.add_argument('--seed', type=int, default=None, help='random seed for a reproducible dataset')
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    return parser.parse_args()
+
+def bulk_insert(model, rows, chunk_size):
+    """Insert the rows produced by the `rows` generator, one transaction per chunk."""
+    start = time.perf_counter()
+    chunk, total = [], 0
+    for row in rows:
+        chunk.append(row)
+        total += 1
+        if len(chunk) == chunk_size:
+            db.session.execute(insert(model), chunk)
+            db.session.commit()
+            chunk = []
+    if chunk:
+        db.session.execute(insert(model), chunk)
+        db.session.commit()
+    print(f"{model.__tablename__}: {total} rows in {time.perf_counter() - start:.1f}s")
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+    fake = Faker("en_US")
+    fake.seed_instance(args.seed)
+
+    # Faker is slow: build pools of text once and sample from them
+    names = [fake.user_name() for _ in range(500)]
+    titles = [fake.sentence(nb_words=6)[:100] for _ in range(1000)]
+    contents = [fake.text(max_nb_chars=500) for _ in range(1000)]
+    excerpts = {content: make_excerpt(content) for content in contents}
+    sentences = [fake.sentence()[:300] for _ in range(1000)]
+    now = datetime.utcnow()
+
+    def random_date():
+        return now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+
+    with app.app_context():
+        db.drop_all()
+        migrations.schema_version.drop(db.engine, checkfirst=True)
+        migrations.upgrade(db.engine)
 
-fake = Faker("en_US")
-
-with app.app_context():
-    db.drop_all()
-    db.create_all()
-
-    users = []
-    # User alice
-    u1 = User(
-        pseudo="Alice",
-        mail="alice@mail.com",
-        role="user"
-    )
-    u1.set_password("1234")
-    users.append(u1)
-
-    for _ in range(30):
-        user = User(
-            pseudo=fake.user_name(),
-            mail=fake.unique.email(),
-            role="user"
-        )
-        user.set_password("1234")
-        users.append(user)
-
-    # Admin
-    admin = User(
-        pseudo="admin",
-        mail="admin@mail.com",
-        role="admin"
-    )
-    admin.set_password("admin")
-
-    db.session.add_all(users + [admin])
-    db.session.commit()
-
-    category_names = [
-        "Technology", "Lifestyle", "Travel", "Food",
-        "Health", "Education", "Science", "Entertainment"
-    ]
-    categories = [Category(name=name) for name in category_names]
-    db.session.add_all(categories)
-    db.session.commit()
-
-    posts = []
-
-    post1 = Post(
-        title=fake.sentence(nb_words=6),
-        content=fake.text(max_nb_chars=500),
-        user_id=u1.id,
-        category_id=random.choice(categories).id
-    )
-    posts.append(post1)
-    for _ in range(100):
-        post = Post(
-            title=fake.sentence(nb_words=6),
-            content=fake.text(max_nb_chars=500),
-            user_id=random.choice(users + [admin]).id,
-            category_id=random.choice(categories).id
-        )
-        posts.append(post)
-
-    db.session.add_all(posts)
-    db.session.commit()
-    comments = []
-    for _ in range(200):
-        comment = Comment(
-            content=fake.sentence(),
-            user_id=random.choice(users + [admin]).id,
-            post_id=random.choice(posts).id
-        )
-        comments.append(comment)
-
-    db.session.add_all(comments)
-    db.session.commit()
-
-    favorites = []
-    for user in users:
-        favorite_posts = random.sample(
-            posts,
-            k=random.randint(0, 10)
-        )
-        for post in favorite_posts:
-            favorites.append(
-                Favorite(
-                    user_id=user.id,
-                    post_id=post.id
-                )
-            )
-
-    db.session.add_all(favorites)
-    db.session.commit()
+        password_hash = passwords.hash_password("1234")
+        admin_hash = passwords.hash_password("admin")
+
+        # Ids are assigned in insertion order on the fresh tables: Alice is 1,
+        # generated users follow and admin is last.
+        def users():
+            yield {"pseudo": "Alice", "mail": "alice@mail.com", "password_hash": password_hash, "role": "user"}
+            for i in range(args.users):
+                yield {
+                    "pseudo": f"{rng.choice(names)[:20]}_{i}",
+                    "mail": f"user{i}@example.com",
+                    "password_hash": password_hash,
+                    "role": "user"
+                }
+            yield {"pseudo": "admin", "mail": "admin@mail.com", "password_hash": admin_hash, "role": "admin"}
+
+        user_count = args.users + 2
+        bulk_insert(User, users(), args.chunk_size)
+        bulk_insert(Category, ({"name": name} for name in CATEGORY_NAMES), args.chunk_size)
+
+        def posts():
+            for i in range(args.posts):
+                content = rng.choice(contents)
+                yield {
+                    "title": rng.choice(titles),
+                    "content": content,
+                    "excerpt": excerpts[content],
+                    "created_at": random_date(),
+                    # Alice always has a post
+                    "user_id": 1 if i == 0 else rng.randint(1, user_count),
+                    "category_id": rng.randint(1, len(CATEGORY_NAMES))
+                }
+
+        # Index the posts once at the end rather than row by row
+        with db.engine.begin() as conn:
+            drop_search_triggers(conn)
+        bulk_insert(Post, posts(), args.chunk_size)
+        start = time.perf_counter()
+        with db.engine.begin() as conn:
+            rebuild_search_index(conn)
+        print(f"search index rebuilt in {time.perf_counter() - start:.1f}s")
+
+        if args.posts:
+            def comments():
+                for _ in range(args.comments):
+                    yield {
+                        "content": rng.choice(sentences),
+                        "created_at": random_date(),
+                        "user_id": rng.randint(1, user_count),
+                        "post_id": rng.randint(1, args.posts)
+                    }
+
+            def favorites():
+                # Spread favorites over users; distinct posts per user keep pairs unique
+                per_user, extra = divmod(args.favorites, user_count)
+                for user_id in range(1, user_count + 1):
+                    count = min(per_user + (1 if user_id <= extra else 0), args.posts)
+                    for post_id in rng.sample(range(1, args.posts + 1), count):
+                        yield {"user_id": user_id, "post_id": post_id}
+
+            bulk_insert(Comment, comments(), args.chunk_size)
+            bulk_insert(Favorite, favorites(), args.chunk_size)
+            with db.engine.begin() as conn:
+                recount_post_counters(conn)
+
+        # Bulk inserts bypass the cache invalidation hooks
+        cache.clear()
 
     print("Database seeded successfully!")
+
+if __name__ == '__main__':
+    main()
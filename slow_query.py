@@ -0,0 +1,107 @@
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+
+from flask import current_app, has_app_context, has_request_context, request
+
+from sql_timing import on_statement
+
+# Statements slower than SLOW_QUERY_THRESHOLD_MS are written, one JSON
+# object per line, to the rotating file SLOW_QUERY_LOG together with their
+# parameters, the route that ran them and the query plan of SELECTs.
+
+MAX_PARAMETER_LENGTH = 200
+EXPLAINED_STATEMENTS = ('SELECT', 'WITH')
+
+logger = logging.getLogger('slow_query')
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+def _parameter(value):
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    text = value.isoformat() if isinstance(value, datetime) else str(value)
+    return text if len(text) <= MAX_PARAMETER_LENGTH else text[:MAX_PARAMETER_LENGTH] + '...'
+
+def _parameters(parameters, executemany):
+    if executemany:
+        # Only the first row of a bulk statement, the rest has the same shape
+        return {'rows': len(parameters), 'first': _parameters(parameters[0], False) if parameters else None}
+    if isinstance(parameters, dict):
+        return {key: _parameter(value) for key, value in parameters.items()}
+    return [_parameter(value) for value in parameters or ()]
+
+def _explain(conn, cursor, statement, parameters):
+    """Run the plan of a SELECT on a raw DBAPI cursor, so no engine event fires again."""
+    dialect = conn.dialect.name
+    explain_cursor = cursor.connection.cursor()
+    try:
+        if dialect == 'sqlite':
+            explain_cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters)
+            return [row[-1] for row in explain_cursor.fetchall()]
+        if dialect == 'postgresql':
+            # A failed EXPLAIN must not abort the transaction of the request
+            explain_cursor.execute('SAVEPOINT slow_query_explain')
+            try:
+                explain_cursor.execute('EXPLAIN ' + statement, parameters)
+                return [row[0] for row in explain_cursor.fetchall()]
+            except Exception:
+                explain_cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+                raise
+            finally:
+                explain_cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+        return None
+    finally:
+        explain_cursor.close()
+
+def _route():
+    if not has_request_context():
+        return None
+    return {
+        'method': request.method,
+        'rule': request.url_rule.rule if request.url_rule else None,
+        'endpoint': request.endpoint,
+        'path': request.full_path.rstrip('?'),
+    }
+
+@on_statement
+def _log_slow_statement(conn, cursor, statement, parameters, context, executemany, elapsed):
+    elapsed_ms = elapsed * 1000
+    if not has_app_context() or 'slow_query' not in current_app.extensions:
+        return
+    threshold = current_app.config.get('SLOW_QUERY_THRESHOLD_MS')
+    if threshold is None or threshold < 0 or elapsed_ms < threshold:
+        return
+
+    plan = None
+    if not executemany and statement.lstrip()[:6].upper().startswith(EXPLAINED_STATEMENTS):
+        try:
+            plan = _explain(conn, cursor, statement, parameters)
+        except Exception as e:
+            plan = [f"EXPLAIN failed: {e}"]
+
+    logger.warning(json.dumps({
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'duration_ms': round(elapsed_ms, 3),
+        'statement': statement,
+        'parameters': _parameters(parameters, executemany),
+        'route': _route(),
+        'plan': plan,
+    }))
+
+def init_slow_query_log(app):
+    path = app.config['SLOW_QUERY_LOG']
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    # One handler per file, even if several apps share the process (tests)
+    if not any(getattr(handler, 'baseFilename', None) == os.path.abspath(path) for handler in logger.handlers):
+        handler = RotatingFileHandler(
+            path,
+            maxBytes=app.config.get('SLOW_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024),
+            backupCount=app.config.get('SLOW_QUERY_LOG_BACKUPS', 5),
+            delay=True
+        )
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+    app.extensions['slow_query'] = logger
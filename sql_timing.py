@@ -0,0 +1,30 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Times every statement once for the modules that report on them (metrics,
+# slow_query). The start time is kept on the execution context of the
+# statement rather than on the pooled connection, so a statement that
+# raises, and never reaches after_cursor_execute, leaves nothing behind.
+
+_listeners = []
+
+def on_statement(listener):
+    """Call `listener(conn, cursor, statement, parameters, context, executemany, elapsed)` after each statement."""
+    _listeners.append(listener)
+    return listener
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_statement(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._sql_timing_start = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _end_statement(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, '_sql_timing_start', None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    for listener in _listeners:
+        listener(conn, cursor, statement, parameters, context, executemany, elapsed)
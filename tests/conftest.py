@@ -1,10 +1,107 @@
 import pytest
 import sys
 import os
+import tempfile
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault('DATABASE_URI', 'sqlite:///:memory:')
+os.environ.setdefault('CACHE_SHARED_BACKEND', 'simple')
+os.environ.setdefault('SLOW_QUERY_LOG', os.path.join(tempfile.mkdtemp(), 'slow_queries.log'))
 from app import app as flask_app, db
+from extensions import cache
 from models import User, Post, Category, Comment, Favorite
+from flask import has_request_context, request as flask_request
+from flask.testing import FlaskClient
 from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from datetime import datetime, timedelta
+
+### Query budgets ###
+# Most SQL statements a single request to each endpoint may run. A request
+# over its budget fails the test, so N+1 query patterns cannot come back
+# unnoticed. Tighten a budget for one test with @pytest.mark.query_budget(n).
+QUERY_BUDGETS = {
+    # app
+    'health_check': 0,
+    'readiness_check': 2,
+    'index': 0,
+    'metrics': 0,
+    # users
+    'get_users': 1,
+    'get_me': 1,
+    'create_user': 2,
+    'update_user': 3,
+    # The ORM cascade loads the posts, comments and favorites of the user
+    'delete_user': 8,
+    'make_user_admin': 3,
+    # login
+    'login': 3,
+    'refresh': 0,
+    'login_google_redirect': 0,
+    'login_google_callback': 3,
+    # posts
+    'get_posts': 2,
+    'get_post': 1,
+    # The first search also checks once for the full-text index
+    'search_posts': 3,
+    'get_posts_by_category': 1,
+    'create_post': 2,
+    'create_posts_batch': 2,
+    'update_post': 3,
+    'delete_post': 4,
+    # categories
+    'get_categories': 2,
+    'get_category': 2,
+    'get_category_posts': 2,
+    'create_category': 2,
+    'update_category': 3,
+    'delete_category': 2,
+    # comments
+    'get_comments_post': 2,
+    'get_comments': 1,
+    'create_comment': 4,
+    'create_comments_batch': 3,
+    'get_comments_user': 1,
+    'update_comment': 3,
+    'delete_comment': 3,
+    # favorites
+    'get_favorites': 1,
+    'add_to_favorites': 6,
+    'add_to_favorites_batch': 5,
+    'delete_favorite': 3,
+    'get_users_by_favorite_post': 3,
+}
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'query_budget(n): most SQL statements each request of the test may run')
+
+class QueryBudgetClient(FlaskClient):
+    """Test client failing any request that runs more SQL statements than its endpoint's budget."""
+
+    budget = None
+
+    def open(self, *args, **kwargs):
+        statements = {}
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            if has_request_context():
+                statements.setdefault(flask_request.endpoint, []).append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', count)
+        try:
+            response = super().open(*args, **kwargs)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count)
+
+        for endpoint, executed in statements.items():
+            budget = self.budget if self.budget is not None else QUERY_BUDGETS.get(endpoint)
+            if budget is None:
+                pytest.fail(f"No query budget declared for endpoint {endpoint!r} in QUERY_BUDGETS")
+            if len(executed) > budget:
+                pytest.fail(
+                    f"{endpoint} ran {len(executed)} SQL statements, budget is {budget}:\n"
+                    + "\n".join(executed)
+                )
+        return response
 
 @pytest.fixture
 def app():
@@ -14,18 +111,26 @@ def app():
         'JWT_SECRET_KEY': 'test-secret-key',
         'SECRET_KEY': 'test-secret-key',
         'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        'BCRYPT_LOG_ROUNDS': 4,
+        'PASSWORD_POOL_SIZE': 0,
     })
     
     with flask_app.app_context():
         db.create_all()
+        cache.clear()
         yield flask_app
         db.session.remove()
         db.drop_all()
 
 @pytest.fixture
-def client(app):
-    """Create Flask client for test"""
-    return app.test_client()
+def client(app, request):
+    """Create Flask client for test, enforcing the query budgets"""
+    app.test_client_class = QueryBudgetClient
+    client = app.test_client()
+    marker = request.node.get_closest_marker('query_budget')
+    if marker:
+        client.budget = marker.args[0]
+    return client
 
 @pytest.fixture
 def runner(app):
@@ -111,3 +216,54 @@ def favorite(app, user, post):
     db.session.commit()
     return fav.id
 
+
+@pytest.fixture
+def add_posts(app, user, category):
+    """Add `count` posts of the test user, one minute apart; returns their ids."""
+    def add(count):
+        start = datetime(2025, 1, 1)
+        posts = [
+            Post(
+                title=f"Post {i}",
+                content=f"Content {i}",
+                user_id=user,
+                category_id=category,
+                created_at=start + timedelta(minutes=i)
+            )
+            for i in range(count)
+        ]
+        db.session.add_all(posts)
+        db.session.commit()
+        return [post.id for post in posts]
+    return add
+
+@pytest.fixture
+def add_comments(app, user, post):
+    """Add `count` comments of the test user on the test post, several per minute; returns their ids."""
+    def add(count):
+        start = datetime(2025, 1, 1)
+        comments = [
+            Comment(content=f"Comment {i}", user_id=user, post_id=post, created_at=start + timedelta(minutes=i % 3))
+            for i in range(count)
+        ]
+        db.session.add_all(comments)
+        db.session.commit()
+        return [comment.id for comment in comments]
+    return add
+
+@pytest.fixture
+def selected(client):
+    """Run a GET through the client; returns the response and the SQL statements it ran."""
+    def get(path, **kwargs):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            response = client.get(path, **kwargs)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+        return response, statements
+    return get
@@ -1,4 +1,16 @@
- 
+import threading
+import time
+import pytest
+from models import User, db
+import passwords
+
+HELD = threading.Lock()
+
+def _take_held_lock():
+    # Runs in a pool process: a forked one would inherit HELD locked
+    with HELD:
+        return passwords._hash("1234", 4)
+
 class TestAuth:
 
     def test_login_success(self, client, user):
@@ -24,3 +36,78 @@ class TestAuth:
         }
         response = client.post('/login', json=data)
         assert response.status_code == 401
+
+    def test_login_rehashes_to_configured_cost(self, app, client, user):
+        stored = db.session.get(User, user)
+        stored.password_hash = passwords._hash("1234", 5)
+        db.session.commit()
+
+        response = client.post('/login', json={"mail": "test@example.com", "password": "1234"})
+        assert response.status_code == 200
+        new_hash = db.session.get(User, user).password_hash
+        assert new_hash.split("$")[2] == "04"
+        assert passwords._check("1234", new_hash)
+
+    def test_login_with_process_pool(self, app, client, user):
+        app.config["PASSWORD_POOL_SIZE"] = 1
+        try:
+            response = client.post('/login', json={"mail": "test@example.com", "password": "1234"})
+        finally:
+            app.config["PASSWORD_POOL_SIZE"] = 0
+        assert response.status_code == 200
+
+    def test_login_pool_full(self, app, client, user):
+        app.config.update({"PASSWORD_POOL_SIZE": 1, "PASSWORD_POOL_QUEUE": 0})
+        _, slots = passwords.hasher._pool(1, 0)
+        slots.acquire()
+        try:
+            response = client.post('/login', json={"mail": "test@example.com", "password": "1234"})
+        finally:
+            slots.release()
+            app.config.update({"PASSWORD_POOL_SIZE": 0, "PASSWORD_POOL_QUEUE": 8})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+
+    def test_login_skips_rehash_when_pool_busy(self, client, user, monkeypatch):
+        stored = db.session.get(User, user)
+        stored.password_hash = old_hash = passwords._hash("1234", 5)
+        db.session.commit()
+
+        def busy(self, password):
+            raise passwords.PasswordPoolBusy()
+        monkeypatch.setattr(User, "set_password", busy)
+        response = client.post('/login', json={"mail": "test@example.com", "password": "1234"})
+        assert response.status_code == 200
+        assert db.session.get(User, user).password_hash == old_hash
+
+    def test_timed_out_job_keeps_its_slot(self, app, monkeypatch):
+        monkeypatch.setitem(app.config, "PASSWORD_POOL_SIZE", 1)
+        monkeypatch.setitem(app.config, "PASSWORD_POOL_QUEUE", 0)
+        monkeypatch.setitem(app.config, "PASSWORD_POOL_TIMEOUT", 0.05)
+        executor, slots = passwords.hasher._pool(1, 0)
+        with pytest.raises(passwords.PasswordPoolBusy):
+            passwords.hasher.run(time.sleep, 0.5)
+        # Still running in the pool: its slot is not free for a new job
+        assert not slots.acquire(blocking=False)
+        for _ in range(50):
+            if slots.acquire(timeout=0.1):
+                slots.release()
+                break
+        assert passwords.hasher.run(abs, -1) == 1
+
+    def test_hash_while_another_thread_holds_a_lock(self, app, monkeypatch):
+        monkeypatch.setitem(app.config, "PASSWORD_POOL_SIZE", 1)
+        monkeypatch.setitem(app.config, "PASSWORD_POOL_TIMEOUT", 5)
+        # A new pool, so its processes start while the lock is held
+        hasher = passwords.PasswordHasher()
+        results = []
+
+        def hash_in_thread():
+            with app.app_context():
+                results.append(hasher.run(_take_held_lock))
+
+        with HELD:
+            thread = threading.Thread(target=hash_in_thread)
+            thread.start()
+            thread.join()
+        assert passwords._check("1234", results[0])
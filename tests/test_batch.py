@@ -0,0 +1,115 @@
+import pytest
+
+class TestBatchRead:
+
+    @pytest.mark.query_budget(1)
+    def test_posts_by_ids_in_requested_order(self, client, user, category, add_posts):
+        first, second, third = add_posts(3)
+        response = client.get(f"/posts?ids={third},9999,{first},{third}")
+        assert response.status_code == 200
+        assert [post["id"] for post in response.json["data"]] == [third, first]
+        assert response.json["missing"] == [9999]
+        assert response.json["data"][0]["content"] == "Content 2"
+
+    def test_posts_by_ids_with_fields(self, client, post):
+        response = client.get(f"/posts?ids={post}&fields=title")
+        assert response.json["data"] == [{"title": "Test post"}]
+
+    def test_users_by_ids(self, client, user, admin):
+        response = client.get(f"/users?ids={admin},{user}")
+        assert [u["id"] for u in response.json["data"]] == [admin, user]
+        assert response.json["missing"] == []
+
+    def test_comments_by_ids(self, client, comment):
+        response = client.get(f"/comments?ids=12345,{comment}")
+        assert [c["id"] for c in response.json["data"]] == [comment]
+        assert response.json["missing"] == [12345]
+        assert client.get("/comments").status_code == 400
+
+    def test_invalid_ids(self, client, app, monkeypatch):
+        assert client.get("/posts?ids=1,abc").status_code == 400
+        assert client.get("/posts?ids=").status_code == 400
+        monkeypatch.setitem(app.config, "BATCH_MAX_IDS", 2)
+        response = client.get("/users?ids=1,2,3")
+        assert response.status_code == 400
+        assert response.json["message"] == "At most 2 ids per request"
+
+class TestBatchWrite:
+
+    def auth(self, token):
+        return {"Authorization": f"Bearer {token}"}
+
+    def test_create_posts(self, client, user_token, category):
+        body = [{"title": f"Bulk {i}", "content": "word " * 100, "category_id": category} for i in range(3)]
+        response = client.post("/posts/batch", json=body, headers=self.auth(user_token))
+        assert response.status_code == 201
+        assert response.json["created"] == 3
+        assert [r["index"] for r in response.json["data"]] == [0, 1, 2]
+        data = response.json["data"][2]["data"]
+        assert data["title"] == "Bulk 2"
+        assert data["excerpt"].endswith("…")
+        assert client.get(f"/posts/{data['id']}").json["data"]["title"] == "Bulk 2"
+
+    def test_created_ids_match_their_items(self, client, user_token, category, post):
+        body = [{"title": f"Bulk {i}", "content": f"Content {i}", "category_id": category} for i in range(5)]
+        response = client.post("/posts/batch", json=body, headers=self.auth(user_token))
+        for item, result in zip(body, response.json["data"]):
+            stored = client.get(f"/posts/{result['data']['id']}").json["data"]
+            assert (stored["title"], stored["content"]) == (item["title"], item["content"])
+        comments = [{"post_id": post, "content": f"Comment {i}"} for i in range(5)]
+        response = client.post("/comments/batch", json=comments, headers=self.auth(user_token))
+        ids = [result["data"]["id"] for result in response.json["data"]]
+        stored = client.get(f"/comments?ids={','.join(map(str, ids))}").json["data"]
+        assert [comment["content"] for comment in stored] == [item["content"] for item in comments]
+
+    def test_posts_list_invalidated(self, client, user_token, category):
+        assert client.get("/posts").json["pagination"]["total_items"] == 0
+        client.post("/posts/batch", json=[{"title": "T", "content": "C", "category_id": category}],
+                    headers=self.auth(user_token))
+        assert client.get("/posts").json["pagination"]["total_items"] == 1
+
+    def test_invalid_item_rejects_batch(self, client, user_token, category):
+        body = [
+            {"title": "Good", "content": "C", "category_id": category},
+            {"title": "", "content": "C", "category_id": category},
+            {"title": "Bad category", "content": "C", "category_id": 9999},
+        ]
+        response = client.post("/posts/batch", json=body, headers=self.auth(user_token))
+        assert response.status_code == 400
+        assert response.json["code"] == "INVALID_BATCH"
+        assert [item["index"] for item in response.json["details"]["items"]] == [1, 2]
+        assert response.json["details"]["items"][1]["errors"] == {"category_id": ["Category does not exist"]}
+        assert client.get("/posts").json["pagination"]["total_items"] == 0
+
+    def test_batch_size_and_shape(self, client, app, user_token, monkeypatch):
+        assert client.post("/posts/batch", json={"title": "T"}, headers=self.auth(user_token)).status_code == 400
+        assert client.post("/posts/batch", json=[], headers=self.auth(user_token)).status_code == 400
+        monkeypatch.setitem(app.config, "BATCH_MAX_ITEMS", 1)
+        response = client.post("/comments/batch", json=[{}, {}], headers=self.auth(user_token))
+        assert response.status_code == 400
+        assert response.json["message"] == "At most 1 items per batch"
+
+    def test_requires_token(self, client):
+        assert client.post("/comments/batch", json=[{"post_id": 1, "content": "C"}]).status_code == 401
+
+    def test_create_comments(self, client, user_token, post):
+        body = [{"post_id": post, "content": "First"}, {"post_id": post, "content": "Second"}]
+        response = client.post("/comments/batch", json=body, headers=self.auth(user_token))
+        assert response.status_code == 201
+        assert [r["data"]["content"] for r in response.json["data"]] == ["First", "Second"]
+        assert len(client.get(f"/posts/{post}/comments").json["data"]) == 2
+
+    def test_add_favorites(self, client, user_token, favorite, post, add_posts):
+        other, = add_posts(1)
+        body = [{"post_id": other}, {"post_id": post}, {"post_id": other}]
+        response = client.post("/favorites/batch", json=body, headers=self.auth(user_token))
+        assert response.status_code == 201
+        assert response.json["created"] == 1
+        assert [r["status"] for r in response.json["data"]] == [201, 400, 400]
+        assert response.json["data"][0]["data"]["post_id"] == other
+        assert len(client.get("/favorites/me", headers=self.auth(user_token)).json["data"]) == 2
+
+    def test_add_favorites_all_existing(self, client, user_token, favorite, post):
+        response = client.post("/favorites/batch", json=[{"post_id": post}], headers=self.auth(user_token))
+        assert response.status_code == 200
+        assert response.json["created"] == 0
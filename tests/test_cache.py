@@ -0,0 +1,132 @@
+from cachelib import SimpleCache
+from caching import TieredCache
+
+class TestCache:
+
+    def test_get_posts_served_from_cache(self, client, post):
+        first = client.get("/posts")
+        second = client.get("/posts")
+        assert first.headers["X-Cache"] == "MISS"
+        assert second.headers["X-Cache"] == "HIT"
+        assert second.json == first.json
+
+    def test_query_string_is_part_of_key(self, client, post):
+        client.get("/posts?limit=5")
+        response = client.get("/posts?limit=6")
+        assert response.headers["X-Cache"] == "MISS"
+
+    def test_errors_are_not_cached(self, client):
+        client.get("/posts/9999")
+        response = client.get("/posts/9999")
+        assert response.status_code == 404
+        assert response.headers["X-Cache"] == "MISS"
+
+    def test_health_reports_counters(self, client, post):
+        client.get("/posts")
+        client.get("/posts")
+        stats = client.get("/health").json["cache"]
+        assert stats["misses"] >= 1
+        assert stats["near_hits"] >= 1
+
+    def test_tiered_cache_reads_through_shared_backend(self):
+        shared = SimpleCache()
+        worker_a = TieredCache(shared, near_threshold=2)
+        worker_b = TieredCache(shared, near_threshold=2)
+
+        worker_a.set("key", "value")
+        assert worker_b.get("key") == "value"
+        assert worker_b.get("key") == "value"
+        assert worker_b.stats() == {"near_hits": 1, "shared_hits": 1, "misses": 0}
+
+        worker_a.delete("key")
+        worker_b.near.clear()
+        assert worker_b.get("key") is None
+        assert worker_b.stats()["misses"] == 1
+
+    def test_create_post_invalidates_list(self, client, category, user_token):
+        client.get("/posts")
+        headers = {"Authorization": f"Bearer {user_token}"}
+        data = {"title": "Fresh", "content": "Fresh content", "category_id": category}
+        client.post("/posts", json=data, headers=headers)
+        response = client.get("/posts")
+        assert response.headers["X-Cache"] == "MISS"
+        assert response.json["data"][0]["title"] == "Fresh"
+
+    def test_update_post_invalidates_only_that_post(self, client, post, user, category, user_token):
+        other = client.post(
+            "/posts",
+            json={"title": "Other", "content": "Other content", "category_id": category},
+            headers={"Authorization": f"Bearer {user_token}"}
+        ).json["data"]["id"]
+        client.get(f"/posts/{post}")
+        client.get(f"/posts/{other}")
+
+        headers = {"Authorization": f"Bearer {user_token}"}
+        client.put(f"/posts/{post}", json={"title": "Changed"}, headers=headers)
+
+        response = client.get(f"/posts/{post}")
+        assert response.headers["X-Cache"] == "MISS"
+        assert response.json["data"]["title"] == "Changed"
+        assert client.get(f"/posts/{other}").headers["X-Cache"] == "HIT"
+
+    def test_comment_write_invalidates_post_comments(self, client, post, user_token):
+        client.get(f"/posts/{post}/comments")
+        headers = {"Authorization": f"Bearer {user_token}"}
+        client.post(f"/posts/{post}/comments", json={"content": "First"}, headers=headers)
+        response = client.get(f"/posts/{post}/comments")
+        assert response.headers["X-Cache"] == "MISS"
+        assert len(response.json["data"]) == 1
+
+    def test_category_update_invalidates_categories(self, client, category, admin_token):
+        client.get("/categories")
+        client.get(f"/categories/{category}")
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        client.patch(f"/categories/{category}", json={"name": "Renamed"}, headers=headers)
+        assert client.get("/categories").json["data"][0]["name"] == "Renamed"
+        assert client.get(f"/categories/{category}").json["data"]["name"] == "Renamed"
+
+    def test_failed_write_does_not_invalidate(self, client, post, user_token):
+        client.get("/posts")
+        headers = {"Authorization": f"Bearer {user_token}"}
+        client.put("/posts/9999", json={"title": "Nope"}, headers=headers)
+        assert client.get("/posts").headers["X-Cache"] == "HIT"
+
+class TestConditionalGet:
+
+    def test_matching_etag_answers_304(self, client, post):
+        first = client.get("/posts")
+        assert first.headers["ETag"]
+        assert first.headers["Cache-Control"] == "no-cache"
+        response = client.get("/posts", headers={"If-None-Match": first.headers["ETag"]})
+        assert response.status_code == 304
+        assert response.data == b""
+        # Answered before the cache and the view
+        assert "X-Cache" not in response.headers
+        assert response.headers["ETag"] == first.headers["ETag"]
+
+    def test_if_modified_since_ignored(self, client, add_posts):
+        first = client.get("/posts")
+        add_posts(1)
+        # Same second as the first version, so Last-Modified may not have moved
+        response = client.get("/posts", headers={"If-Modified-Since": first.headers["Last-Modified"]})
+        assert response.status_code == 200
+        assert len(response.json["data"]) == 1
+
+    def test_star_tag_does_not_hide_errors(self, client, post):
+        assert client.get("/posts/999", headers={"If-None-Match": "*"}).status_code == 404
+        assert client.get("/posts?limit=-5", headers={"If-None-Match": "*"}).status_code == 400
+        assert client.get(f"/posts/{post}", headers={"If-None-Match": "*"}).status_code == 200
+
+    def test_etag_changes_after_write(self, client, post, user_token):
+        etag = client.get(f"/posts/{post}/comments").headers["ETag"]
+        client.post(f"/posts/{post}/comments", json={"content": "New"},
+                    headers={"Authorization": f"Bearer {user_token}"})
+        response = client.get(f"/posts/{post}/comments", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert len(response.json["data"]) == 1
+
+    def test_etag_depends_on_query_string(self, client, post):
+        etag = client.get("/categories").headers["ETag"]
+        response = client.get("/categories?posts_limit=1", headers={"If-None-Match": etag})
+        assert response.status_code == 200
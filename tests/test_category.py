@@ -0,0 +1,52 @@
+from models import Category, db
+
+class TestCategories:
+
+    def test_get_categories_counts_posts(self, client, category, add_posts):
+        empty = Category(name="Empty")
+        db.session.add(empty)
+        db.session.commit()
+        add_posts(3)
+
+        response = client.get("/categories")
+        assert response.status_code == 200
+        assert response.json["data"] == [
+            {"id": category, "name": "Fiction", "post_count": 3},
+            {"id": empty.id, "name": "Empty", "post_count": 0},
+        ]
+
+    def test_get_categories_with_latest_post_ids(self, client, add_posts):
+        ids = add_posts(3)
+        response = client.get("/categories?posts_limit=2")
+        assert response.json["data"][0]["posts"] == [ids[2], ids[1]]
+
+    def test_get_categories_invalid_posts_limit(self, client):
+        assert client.get("/categories?posts_limit=1000").status_code == 400
+
+    def test_get_category(self, client, post, category):
+        response = client.get(f"/categories/{category}")
+        assert response.status_code == 200
+        assert response.json["data"]["post_count"] == 1
+
+    def test_get_category_posts_paginated(self, client, category, add_posts):
+        ids = add_posts(3)
+        response = client.get(f"/categories/{category}/posts?limit=2")
+        assert [p["id"] for p in response.json["data"]] == [ids[2], ids[1]]
+        next_cursor = response.json["pagination"]["next_cursor"]
+        response = client.get(f"/categories/{category}/posts?limit=2&cursor={next_cursor}")
+        assert [p["id"] for p in response.json["data"]] == [ids[0]]
+        assert response.json["pagination"]["has_next"] is False
+
+    def test_get_category_posts_invalid_limit(self, client, category):
+        response = client.get(f"/categories/{category}/posts?limit=1000000")
+        assert response.status_code == 400
+        assert response.json["message"] == "Limit must be between 1 and 100"
+        assert client.get(f"/categories/{category}/posts?limit=0").status_code == 400
+
+    def test_get_category_posts_not_found(self, client):
+        assert client.get("/categories/9999/posts").status_code == 404
+
+    def test_delete_category_with_posts(self, client, post, category, admin_token):
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        response = client.delete(f"/categories/{category}", headers=headers)
+        assert response.status_code == 409
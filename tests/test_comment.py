@@ -1,3 +1,6 @@
+from sqlalchemy import inspect
+from models import Comment, db
+
 class TestComments:
 
     def test_get_comments_by_post(self, client, post):
@@ -68,3 +71,33 @@ class TestComments:
             headers=headers
         )
         assert response.status_code == 200
+
+
+class TestCommentsPagination:
+
+    def test_pages_in_created_order(self, client, post, add_comments):
+        add_comments(7)
+        expected = [c.id for c in Comment.query.order_by(Comment.created_at, Comment.id)]
+        seen, cursor = [], ""
+        while cursor is not None:
+            response = client.get(f"/posts/{post}/comments?limit=3&cursor={cursor}")
+            assert response.status_code == 200
+            seen += [comment["id"] for comment in response.json["data"]]
+            cursor = response.json["pagination"]["next_cursor"]
+        assert seen == expected
+        assert response.json["pagination"]["total_items"] == 7
+
+    def test_default_limit(self, client, post, add_comments):
+        add_comments(25)
+        response = client.get(f"/posts/{post}/comments")
+        assert len(response.json["data"]) == 20
+        assert response.json["pagination"]["has_next"] is True
+
+    def test_limit_capped(self, client, post):
+        assert client.get(f"/posts/{post}/comments?limit=101").status_code == 400
+        assert client.get(f"/posts/{post}/comments?limit=0").status_code == 400
+        assert client.get(f"/posts/{post}/comments?cursor=notacursor").status_code == 400
+
+    def test_index_on_post_and_date(self, app):
+        indexes = {index["name"]: index["column_names"] for index in inspect(db.engine).get_indexes("comment")}
+        assert indexes["ix_comment_post_id_created_at"] == ["post_id", "created_at"]
@@ -0,0 +1,74 @@
+import gzip
+import json
+import pytest
+from models import User, db
+
+@pytest.fixture
+def posts(app, add_posts):
+    return add_posts(30)
+
+class TestCompression:
+
+    def test_gzip_when_accepted(self, client, posts):
+        response = client.get("/posts?limit=30", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["Vary"]
+        assert len(json.loads(gzip.decompress(response.data))["data"]) == 30
+
+    def test_brotli_preferred(self, client, posts):
+        brotli = pytest.importorskip("brotli")
+        response = client.get("/posts?limit=30", headers={"Accept-Encoding": "gzip, br"})
+        assert response.headers["Content-Encoding"] == "br"
+        assert len(json.loads(brotli.decompress(response.data))["data"]) == 30
+
+    def test_not_compressed_without_accept_encoding(self, client, posts):
+        response = client.get("/posts?limit=30")
+        assert "Content-Encoding" not in response.headers
+        assert len(response.json["data"]) == 30
+
+    def test_identity_response_varies_on_accept_encoding(self, client, app, posts, monkeypatch):
+        # Without the app-wide hook, the cached route still sets Vary itself
+        hooks = [hook for hook in app.after_request_funcs[None] if hook.__name__ != "compress_response"]
+        monkeypatch.setitem(app.after_request_funcs, None, hooks)
+        for cache in ("MISS", "HIT"):
+            response = client.get("/posts?limit=30")
+            assert response.headers["X-Cache"] == cache
+            assert "Content-Encoding" not in response.headers
+            assert "Accept-Encoding" in response.headers["Vary"]
+
+    def test_small_responses_not_compressed(self, client, post):
+        response = client.get(f"/posts/{post}", headers={"Accept-Encoding": "gzip"})
+        assert "Content-Encoding" not in response.headers
+
+    def test_uncached_routes_compressed(self, client, app):
+        db.session.add_all([User(pseudo=f"reader{i}", mail=f"reader{i}@mail.com", password_hash="x") for i in range(30)])
+        db.session.commit()
+        response = client.get("/users", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert len(json.loads(gzip.decompress(response.data))["data"]) == 30
+
+    def test_errors_not_compressed(self, client):
+        response = client.get("/posts/9999", headers={"Accept-Encoding": "gzip"})
+        assert "Content-Encoding" not in response.headers
+
+    def test_cache_hit_served_precompressed(self, client, posts, monkeypatch):
+        headers = {"Accept-Encoding": "gzip"}
+        first = client.get("/posts?limit=30", headers=headers)
+        monkeypatch.setattr(gzip, "compress", lambda *args, **kwargs: pytest.fail("compressed again"))
+        second = client.get("/posts?limit=30", headers=headers)
+        assert second.headers["X-Cache"] == "HIT"
+        assert second.headers["Content-Encoding"] == "gzip"
+        assert second.data == first.data
+
+    def test_encoded_etag_revalidates(self, client, posts):
+        first = client.get("/posts?limit=30", headers={"Accept-Encoding": "gzip"})
+        assert first.headers["ETag"].endswith('-gzip"')
+        plain = client.get("/posts?limit=30")
+        assert plain.headers["ETag"] != first.headers["ETag"]
+        response = client.get("/posts?limit=30", headers={
+            "Accept-Encoding": "gzip",
+            "If-None-Match": first.headers["ETag"]
+        })
+        assert response.status_code == 304
+        assert response.headers["ETag"] == first.headers["ETag"]
+        assert "Accept-Encoding" in response.headers["Vary"]
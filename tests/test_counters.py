@@ -0,0 +1,54 @@
+from sqlalchemy import text
+from models import Comment, Post, User, db
+
+def counters(post_id):
+    db.session.expire_all()
+    post = db.session.get(Post, post_id)
+    return post.comment_count, post.favorite_count
+
+class TestPostCounters:
+
+    def test_comment_create_and_delete(self, client, post, user_token):
+        headers = {"Authorization": f"Bearer {user_token}"}
+        response = client.post(f"/posts/{post}/comments", json={"content": "Hello"}, headers=headers)
+        assert counters(post) == (1, 0)
+        client.delete(f"/comments/{response.json['data']['id']}", headers=headers)
+        assert counters(post) == (0, 0)
+
+    def test_favorite_add_and_delete(self, client, post, user_token):
+        headers = {"Authorization": f"Bearer {user_token}"}
+        client.post(f"/favorites/{post}", headers=headers)
+        assert counters(post) == (0, 1)
+        client.delete(f"/favorites/{post}", headers=headers)
+        assert counters(post) == (0, 0)
+
+    def test_batches(self, client, post, user_token):
+        headers = {"Authorization": f"Bearer {user_token}"}
+        client.post("/comments/batch", json=[{"post_id": post, "content": "A"}] * 3, headers=headers)
+        client.post("/favorites/batch", json=[{"post_id": post}, {"post_id": post}], headers=headers)
+        assert counters(post) == (3, 1)
+
+    def test_user_cascade(self, post, comment, favorite):
+        fan = User(pseudo="fan", mail="fan@mail.com", password_hash="x")
+        db.session.add(fan)
+        db.session.flush()
+        db.session.add(Comment(content="Nice", user_id=fan.id, post_id=post))
+        db.session.commit()
+        assert counters(post) == (2, 1)
+        db.session.delete(fan)
+        db.session.commit()
+        assert counters(post) == (1, 1)
+
+    def test_included_counts(self, client, post, comment, favorite):
+        response = client.get("/posts?fields=id&include=comment_count,favorite_count")
+        assert response.json["data"] == [{"id": post, "comment_count": 1, "favorite_count": 1}]
+
+    def test_recount_command_repairs_drift(self, client, runner, post, comment):
+        db.session.execute(text("UPDATE post SET comment_count = 7, favorite_count = 2"))
+        db.session.commit()
+        assert client.get(f"/posts/{post}/comments").json["pagination"]["total_items"] == 7
+        result = runner.invoke(args=["recount-post-counters"])
+        assert "1 posts fixed" in result.output
+        assert counters(post) == (1, 0)
+        assert client.get(f"/posts/{post}/comments").json["pagination"]["total_items"] == 1
+        assert "0 posts fixed" in runner.invoke(args=["recount-post-counters"]).output
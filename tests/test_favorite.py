@@ -0,0 +1,40 @@
+import pytest
+from models import User, Favorite, db
+
+def add_fans(post, count):
+    users = [User(pseudo=f"fan{i}", mail=f"fan{i}@mail.com", password_hash="x") for i in range(count)]
+    db.session.add_all(users)
+    db.session.flush()
+    db.session.add_all([Favorite(user_id=user.id, post_id=post) for user in users])
+    db.session.commit()
+    return [user.id for user in users]
+
+class TestFavorites:
+
+    def test_add_favorite_twice(self, client, post, user_token):
+        headers = {"Authorization": f"Bearer {user_token}"}
+        assert client.post(f"/favorites/{post}", headers=headers).status_code == 201
+        assert client.post(f"/favorites/{post}", headers=headers).status_code == 400
+
+    def test_get_users_by_favorite_post_paginated(self, client, post, admin_token):
+        fans = add_fans(post, 3)
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        response = client.get(f"/favorites/posts/{post}/users?limit=2", headers=headers)
+        assert response.status_code == 200
+        assert [u["id"] for u in response.json["data"]] == fans[:2]
+        assert response.json["pagination"]["total_items"] == 3
+
+        response = client.get(f"/favorites/posts/{post}/users?limit=2&page=2", headers=headers)
+        assert [u["id"] for u in response.json["data"]] == fans[2:]
+
+    def test_get_users_by_favorite_post_not_found(self, client, admin_token):
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        assert client.get("/favorites/posts/9999/users", headers=headers).status_code == 404
+
+    # Post lookup, count, page: independent of the number of favorites
+    @pytest.mark.query_budget(3)
+    def test_get_users_by_favorite_post_query_count(self, client, post, admin_token):
+        add_fans(post, 30)
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        response = client.get(f"/favorites/posts/{post}/users", headers=headers)
+        assert len(response.json["data"]) == 30
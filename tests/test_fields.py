@@ -0,0 +1,44 @@
+class TestSparseFieldsets:
+
+    def test_posts_narrowed(self, client, add_posts, selected):
+        add_posts(3)
+        response, statements = selected("/posts?fields=title,id,created_at")
+        assert response.status_code == 200
+        assert [list(post) for post in response.json["data"]] == [["id", "title", "created_at"]] * 3
+        page_query = next(s for s in statements if "ORDER BY post.created_at" in s)
+        assert "post.content" not in page_query
+
+    def test_posts_cursor_narrowed(self, client, add_posts):
+        add_posts(3)
+        response = client.get("/posts?cursor=&limit=2&fields=title")
+        assert [list(post) for post in response.json["data"]] == [["title"]] * 2
+        next_page = client.get(f"/posts?cursor={response.json['pagination']['next_cursor']}&limit=2&fields=title")
+        assert len(next_page.json["data"]) == 1
+
+    def test_search_and_category_posts_narrowed(self, client, category, add_posts, selected):
+        add_posts(2)
+        for path in ("/posts/search?title=Post&fields=id", f"/categories/{category}/posts?fields=id",
+                     "/posts/category?category=Fiction&fields=id"):
+            response, statements = selected(path)
+            assert response.status_code == 200, path
+            assert all(list(post) == ["id"] for post in response.json["data"])
+            page_query = next(s for s in statements if "FROM post" in s and "count(*)" not in s)
+            assert "post.content" not in page_query, path
+
+    def test_comments_narrowed(self, client, comment, post, user_token):
+        response = client.get(f"/posts/{post}/comments?fields=content")
+        assert response.json["data"] == [{"content": "Super post !"}]
+        response = client.get("/comments/me?fields=id,post_id", headers={"Authorization": f"Bearer {user_token}"})
+        assert response.json["data"] == [{"id": comment, "post_id": post}]
+
+    def test_users_narrowed(self, client, user, selected):
+        response, statements = selected("/users?fields=pseudo")
+        assert response.json["data"] == [{"pseudo": "testuser"}]
+        assert "password_hash" not in statements[0]
+
+    def test_unknown_field_rejected(self, client):
+        response = client.get("/posts?fields=id,password")
+        assert response.status_code == 400
+        assert response.json["details"]["unknown"] == ["password"]
+        assert client.get("/users?fields=password_hash").status_code == 400
+        assert client.get("/posts?fields=,").status_code == 400
@@ -0,0 +1,60 @@
+import pytest
+from models import Comment, db
+
+ALL = "author,category,comment_count,favorite_count"
+
+class TestInclude:
+
+    def test_posts_embed_relations(self, client, user, category, post, comment, favorite):
+        response = client.get(f"/posts?include={ALL}")
+        assert response.status_code == 200
+        data = response.json["data"][0]
+        assert data["author"] == {"id": user, "pseudo": "testuser"}
+        assert data["category"] == {"id": category, "name": "Fiction"}
+        assert data["comment_count"] == 1
+        assert data["favorite_count"] == 1
+
+    def test_query_count_does_not_grow_with_page(self, client, add_posts, selected):
+        add_posts(20)
+        plain, plain_statements = selected("/posts?limit=20")
+        included, statements = selected(f"/posts?limit=20&include={ALL}")
+        assert len(included.json["data"]) == 20
+        assert len(statements) == len(plain_statements)
+        assert all(post["comment_count"] == 0 for post in included.json["data"])
+
+    @pytest.mark.query_budget(1)
+    def test_single_post(self, client, post, comment):
+        response = client.get(f"/posts/{post}?include=author,comment_count")
+        assert response.json["data"]["author"]["pseudo"] == "testuser"
+        assert response.json["data"]["comment_count"] == 1
+        assert "category" not in response.json["data"]
+
+    def test_other_post_endpoints(self, client, user, category, post):
+        for path in ("/posts?cursor=&include=category", "/posts/search?title=Test&include=category",
+                     "/posts/category?category=Fiction&include=category", f"/posts?ids={post}&include=category",
+                     f"/categories/{category}/posts?include=category"):
+            response = client.get(path)
+            assert response.status_code == 200, path
+            assert response.json["data"][0]["category"]["name"] == "Fiction", path
+
+    def test_with_fields(self, client, post):
+        response = client.get("/posts?fields=title&include=comment_count")
+        assert response.json["data"] == [{"title": "Test post", "comment_count": 0}]
+
+    def test_unknown_relation_rejected(self, client, post):
+        response = client.get("/posts?include=author,comments")
+        assert response.status_code == 400
+        assert response.json["details"]["unknown"] == ["comments"]
+        assert client.get(f"/posts/{post}?include=").status_code == 400
+
+    def test_cached_counts_invalidated(self, client, user, post):
+        assert client.get("/posts?include=comment_count").json["data"][0]["comment_count"] == 0
+        db.session.add(Comment(content="New", user_id=user, post_id=post))
+        db.session.commit()
+        assert client.get("/posts?include=comment_count").json["data"][0]["comment_count"] == 1
+
+    def test_cached_author_invalidated(self, client, user_token, post):
+        assert client.get("/posts?include=author").json["data"][0]["author"]["pseudo"] == "testuser"
+        client.put("/users/me", json={"pseudo": "renamed", "mail": "renamed@mail.com"},
+                   headers={"Authorization": f"Bearer {user_token}"})
+        assert client.get("/posts?include=author").json["data"][0]["author"]["pseudo"] == "renamed"
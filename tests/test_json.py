@@ -0,0 +1,23 @@
+from datetime import datetime
+from json_provider import IsoJSONProvider, OrjsonProvider
+
+class TestJSONProvider:
+
+    def test_app_uses_orjson(self, app):
+        assert isinstance(app.json, OrjsonProvider)
+
+    def test_created_at_in_iso_format(self, client, post):
+        data = client.get(f"/posts/{post}").json["data"]
+        assert datetime.fromisoformat(data["created_at"])
+
+    def test_providers_agree(self, app):
+        obj = {"at": datetime(2025, 1, 2, 3, 4, 5, 6), "ids": [1, 2], "text": "été"}
+        fallback = IsoJSONProvider(app)
+        assert app.json.loads(app.json.dumps(obj)) == fallback.loads(fallback.dumps(obj))
+        assert app.json.loads(app.json.dumps(obj))["at"] == "2025-01-02T03:04:05.000006"
+
+    def test_request_body_parsed(self, client, user_token, category):
+        response = client.post("/posts", json={"title": "é", "content": "ü", "category_id": category},
+                               headers={"Authorization": f"Bearer {user_token}"})
+        assert response.status_code == 201
+        assert response.json["data"]["title"] == "é"
@@ -0,0 +1,64 @@
+import json
+import logging
+import pytest
+from request_logging import BoundedQueueHandler, JsonFormatter
+
+class Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+@pytest.fixture
+def captured(app, monkeypatch):
+    state = app.extensions['request_logging']
+    capture = Capture()
+    monkeypatch.setattr(state.listener, 'handlers', state.listener.handlers + (capture,))
+
+    def lines():
+        state.flush()
+        return [json.loads(JsonFormatter().format(record)) for record in capture.records]
+    return lines
+
+class TestRequestLogging:
+
+    def test_request_logged_as_json(self, app, client, captured, monkeypatch):
+        monkeypatch.setitem(app.config, 'LOG_SAMPLE_RATE_2XX', 1.0)
+        client.get("/posts?limit=5")
+        line = [entry for entry in captured() if entry['logger'] == 'app.access'][-1]
+        assert line['method'] == "GET"
+        assert line['path'] == "/posts?limit=5"
+        assert line['route'] == "/posts"
+        assert line['status'] == 200
+        assert line['duration_ms'] >= 0
+
+    def test_successful_requests_sampled(self, app, client, captured, monkeypatch):
+        monkeypatch.setitem(app.config, 'LOG_SAMPLE_RATE_2XX', 0.0)
+        etag = client.get("/posts").headers["ETag"]
+        client.get("/posts", headers={"If-None-Match": etag})
+        client.get("/posts/9999")
+        statuses = [entry['status'] for entry in captured() if entry['logger'] == 'app.access']
+        assert statuses == [304, 404]
+
+    def test_exception_logged_with_traceback(self, app, captured):
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            app.logger.exception("get_users failed")
+        line = captured()[-1]
+        assert line['level'] == "ERROR"
+        assert line['message'] == "get_users failed"
+        assert "RuntimeError: boom" in line['exception']
+
+    def test_full_queue_drops_records(self):
+        handler = BoundedQueueHandler(2)
+        logger = logging.getLogger('test_full_queue')
+        logger.propagate = False
+        logger.addHandler(handler)
+        for i in range(5):
+            logger.warning("record %s", i)
+        logger.removeHandler(handler)
+        assert handler.queue.qsize() == 2
+        assert handler.dropped == 3
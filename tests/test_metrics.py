@@ -0,0 +1,45 @@
+import pytest
+from prometheus_client.parser import text_string_to_metric_families
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from models import db
+
+def samples(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(response.get_data(as_text=True))
+        for sample in family.samples
+    }
+
+class TestMetrics:
+
+    def test_request_counted_by_route_and_status(self, client, post):
+        key = ("http_requests_total", (("endpoint", "/posts/<int:post_id>"), ("method", "GET"), ("status", "404")))
+        before = samples(client).get(key, 0)
+        client.get("/posts/9999")
+        client.get("/posts/9998")
+        assert samples(client)[key] == before + 2
+
+    def test_latency_and_sql_histograms(self, client, post):
+        client.get(f"/posts/{post}/comments")
+        metrics = samples(client)
+        endpoint = (("endpoint", "/posts/<int:post_id>/comments"),)
+        assert metrics[("http_request_sql_queries_count", endpoint)] >= 1
+        assert metrics[("http_request_sql_queries_sum", endpoint)] >= 1
+        assert metrics[("http_request_duration_seconds_count", (("endpoint", "/posts/<int:post_id>/comments"), ("method", "GET")))] >= 1
+
+    def test_in_flight_back_to_zero(self, client):
+        client.get("/health")
+        # Only the /metrics request itself is in flight while it renders
+        assert samples(client)[("http_requests_in_flight", ())] == 1
+
+    def test_failed_statements_leave_no_timing_state(self, app):
+        with db.engine.connect() as conn:
+            for _ in range(5):
+                with pytest.raises(OperationalError):
+                    conn.execute(text("SELECT * FROM missing_table"))
+                conn.rollback()
+            assert conn.execute(text("SELECT 1")).scalar() == 1
+            assert not [key for key in conn.info if key.endswith("_start")]
@@ -0,0 +1,78 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from models import db
+import migrations
+
+LEGACY_SCHEMA = [
+    "CREATE TABLE user (id INTEGER PRIMARY KEY, pseudo VARCHAR(30) NOT NULL UNIQUE, "
+    "mail VARCHAR(50) NOT NULL UNIQUE, password_hash VARCHAR(100) NOT NULL, role VARCHAR(20) NOT NULL)",
+    "CREATE TABLE category (id INTEGER PRIMARY KEY, name VARCHAR(50) NOT NULL UNIQUE)",
+    "CREATE TABLE post (id INTEGER PRIMARY KEY, title VARCHAR(100) NOT NULL, content TEXT NOT NULL, "
+    "created_at DATETIME, user_id INTEGER NOT NULL REFERENCES user(id), "
+    "category_id INTEGER NOT NULL REFERENCES category(id))",
+    "CREATE TABLE comment (id INTEGER PRIMARY KEY, content VARCHAR(300) NOT NULL, created_at DATETIME, "
+    "user_id INTEGER NOT NULL REFERENCES user(id), post_id INTEGER NOT NULL REFERENCES post(id))",
+    "CREATE TABLE favorite (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL REFERENCES user(id), "
+    "post_id INTEGER NOT NULL REFERENCES post(id))",
+    "INSERT INTO user VALUES (1, 'alice', 'alice@mail.com', 'x', 'user')",
+    "INSERT INTO category VALUES (1, 'Travel')",
+    "INSERT INTO post VALUES (1, 'Trip to Lisbon', 'Content', '2025-01-01 00:00:00', 1, 1)",
+    "INSERT INTO favorite VALUES (1, 1, 1)",
+    "INSERT INTO favorite VALUES (2, 1, 1)",
+]
+
+def index_names(engine, table):
+    return {index['name'] for index in inspect(engine).get_indexes(table)}
+
+class TestMigrations:
+
+    def test_upgrade_fresh_database(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+        assert migrations.upgrade(engine) == [1, 2, 3, 4, 5, 6]
+        assert migrations.current_version(engine) == migrations.LATEST_VERSION
+        assert "ix_post_created_at" in index_names(engine, "post")
+        assert migrations.upgrade(engine) == []
+
+    def test_upgrade_legacy_database_in_place(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+        with engine.begin() as conn:
+            for statement in LEGACY_SCHEMA:
+                conn.execute(text(statement))
+
+        migrations.upgrade(engine)
+
+        assert {"ix_post_created_at", "ix_post_user_id", "ix_post_category_id"} <= index_names(engine, "post")
+        assert {"ix_comment_post_id_created_at", "ix_comment_user_id"} <= index_names(engine, "comment")
+        assert {"ix_favorite_post_id", "uq_favorite_user_post"} <= index_names(engine, "favorite")
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM favorite")).scalar() == 1
+            matches = conn.execute(text("SELECT rowid FROM post_fts WHERE post_fts MATCH 'lisbon'")).scalars().all()
+            assert matches == [1]
+            assert conn.execute(text("SELECT excerpt FROM post")).scalar() == "Content"
+            counters = conn.execute(text("SELECT comment_count, favorite_count FROM post")).one()
+            assert tuple(counters) == (0, 1)
+
+@pytest.fixture
+def unversioned(app):
+    app.extensions.pop("schema_ready", None)
+    yield
+    app.extensions.pop("schema_ready", None)
+    migrations.schema_version.drop(db.engine, checkfirst=True)
+
+class TestReadiness:
+
+    def test_ready_follows_schema_version(self, client, unversioned):
+        assert client.get("/ready").status_code == 503
+
+        migrations.upgrade(db.engine)
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json["schema_version"] == migrations.LATEST_VERSION
+
+    def test_api_gated_until_schema_ready(self, app, client, unversioned):
+        app.config["TESTING"] = False
+        try:
+            assert client.get("/posts").status_code == 503
+            assert client.get("/health").status_code == 200
+        finally:
+            app.config["TESTING"] = True
@@ -1,3 +1,8 @@
+import base64
+
+import pytest
+
+from models import EXCERPT_LENGTH, Post, db
 
 class TestPosts:
 
@@ -41,8 +46,93 @@ class TestPosts:
         response = client.put(f"/posts/{post}", json=data, headers=headers)
         assert response.status_code == 200
 
+    def test_get_posts_cursor_walks_all_pages(self, client, add_posts):
+        ids = add_posts(5)
+        seen = []
+        response = client.get("/posts?cursor=&limit=2")
+        while True:
+            assert response.status_code == 200
+            seen += [post["id"] for post in response.json["data"]]
+            next_cursor = response.json["pagination"]["next_cursor"]
+            if next_cursor is None:
+                break
+            response = client.get(f"/posts?cursor={next_cursor}&limit=2")
+        assert seen == list(reversed(ids))
+        assert "total_items" not in response.json["pagination"]
+
+    def test_get_posts_cursor_with_total(self, client, add_posts):
+        add_posts(3)
+        response = client.get("/posts?cursor=&limit=2&total=true")
+        assert response.status_code == 200
+        assert response.json["pagination"]["total_items"] == 3
+        assert response.json["pagination"]["has_next"] is True
+
+    def test_get_posts_invalid_cursor(self, client):
+        response = client.get("/posts?cursor=not-a-cursor")
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize("payload", [b'["2020-01-01",1e999]', b'["2020-01-01",1180591620717411303424]', b'["2020-01-01",0]'])
+    def test_get_posts_cursor_id_out_of_range(self, client, payload):
+        cursor = base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+        response = client.get(f"/posts?cursor={cursor}")
+        assert response.status_code == 400
+        assert response.json["code"] == "INVALID_QUERY_PARAM"
 
+    def test_search_posts_cursor(self, client, add_posts):
+        ids = add_posts(3)
+        response = client.get("/posts/search?title=Post&cursor=&limit=2")
+        assert response.status_code == 200
+        assert [post["id"] for post in response.json["data"]] == [ids[2], ids[1]]
+        next_cursor = response.json["pagination"]["next_cursor"]
+        response = client.get(f"/posts/search?title=Post&cursor={next_cursor}&limit=2")
+        assert [post["id"] for post in response.json["data"]] == [ids[0]]
 
+    def test_search_posts_uses_full_text_index(self, client, post, user_token):
+        headers = {"Authorization": f"Bearer {user_token}"}
+        client.put(f"/posts/{post}", json={"title": "Volcanoes of Iceland"}, headers=headers)
+
+        response = client.get("/posts/search?title=volcano")
+        assert [p["id"] for p in response.json["data"]] == [post]
+        assert client.get("/posts/search?title=Test").json["data"] == []
+
+        client.delete(f"/posts/{post}", headers=headers)
+        assert client.get("/posts/search?title=volcano").json["data"] == []
+
+    def test_rebuild_search_index_invalidates_cached_results(self, client, runner, post):
+        client.get("/posts/search?title=Test")
+        assert client.get("/posts/search?title=Test").headers["X-Cache"] == "HIT"
+        assert "Search index rebuilt" in runner.invoke(args=["rebuild-search-index"]).output
+        assert client.get("/posts/search?title=Test").headers["X-Cache"] == "MISS"
+
+    def test_search_posts_ranked_by_relevance(self, client, user, category):
+        db.session.add_all([
+            Post(title="Gardening", content="tomato", user_id=user, category_id=category),
+            Post(title="Tomato tomato tomato", content="tomato tomato", user_id=user, category_id=category),
+        ])
+        db.session.commit()
+        response = client.get("/posts/search?content=tomato")
+        assert [p["title"] for p in response.json["data"]] == ["Tomato tomato tomato", "Gardening"]
+
+class TestExcerpts:
+
+    def test_excerpt_stored_on_write(self, client, category, user_token):
+        headers = {"Authorization": f"Bearer {user_token}"}
+        content = "word " * 100
+        response = client.post("/posts", json={"title": "Long", "content": content, "category_id": category}, headers=headers)
+        post_id = response.json["data"]["id"]
+        excerpt = db.session.get(Post, post_id).excerpt
+        assert excerpt.endswith("…") and len(excerpt) <= EXCERPT_LENGTH + 1
 
+        client.put(f"/posts/{post_id}", json={"content": "Short now"}, headers=headers)
+        db.session.expire_all()
+        assert db.session.get(Post, post_id).excerpt == "Short now"
 
+    def test_listings_send_excerpt_not_content(self, client, category, add_posts):
+        add_posts(2)
+        for path in ("/posts", "/posts?cursor=", "/posts/search?title=Post", f"/categories/{category}/posts"):
+            data = client.get(path).json["data"]
+            assert data and all("content" not in post and post["excerpt"].startswith("Content") for post in data), path
 
+    def test_single_post_and_explicit_fields_send_content(self, client, post):
+        assert client.get(f"/posts/{post}").json["data"]["content"] == "Test content"
+        assert client.get("/posts?fields=id,content").json["data"] == [{"id": post, "content": "Test content"}]
@@ -0,0 +1,68 @@
+import pytest
+from conftest import QUERY_BUDGETS
+from models import User, Comment, Favorite, db
+
+@pytest.fixture
+def busy_blog(app, user, category, add_posts):
+    """20 posts of the test user, each with comments and favorites of 5 other users."""
+    posts = add_posts(20)
+    fans = [User(pseudo=f"fan{i}", mail=f"fan{i}@mail.com", password_hash="x") for i in range(5)]
+    db.session.add_all(fans)
+    db.session.flush()
+    for post in posts:
+        for fan in fans:
+            db.session.add(Comment(content="Nice", user_id=fan.id, post_id=post))
+            db.session.add(Favorite(user_id=fan.id, post_id=post))
+        db.session.add(Comment(content="Thanks", user_id=user, post_id=post))
+        db.session.add(Favorite(user_id=user, post_id=post))
+    db.session.commit()
+    return posts
+
+class TestQueryBudgets:
+
+    def test_every_endpoint_has_a_budget(self, app):
+        endpoints = {
+            endpoint for endpoint in app.view_functions
+            if endpoint != 'static' and not endpoint.startswith('flasgger.')
+        }
+        assert endpoints - set(QUERY_BUDGETS) == set()
+        assert set(QUERY_BUDGETS) - endpoints == set()
+
+    @pytest.mark.parametrize("path", [
+        "/posts?limit=20",
+        "/posts?cursor=&limit=20",
+        "/posts/search?title=Post&limit=20",
+        "/posts/category?category=Fiction&limit=20",
+        "/categories",
+        "/categories/{category}",
+        "/categories/{category}/posts?limit=20",
+        "/posts/{post}/comments",
+        "/users",
+    ])
+    def test_public_listings_within_budget(self, client, busy_blog, category, path):
+        response = client.get(path.format(category=category, post=busy_blog[0]))
+        assert response.status_code == 200
+
+    @pytest.mark.parametrize("path", ["/comments/me", "/favorites/me", "/users/me"])
+    def test_own_listings_within_budget(self, client, busy_blog, user_token, path):
+        response = client.get(path, headers={"Authorization": f"Bearer {user_token}"})
+        assert response.status_code == 200
+
+    def test_admin_listing_within_budget(self, client, busy_blog, admin_token):
+        response = client.get(f"/favorites/posts/{busy_blog[0]}/users",
+                              headers={"Authorization": f"Bearer {admin_token}"})
+        assert response.status_code == 200
+
+    def test_writes_within_budget(self, client, user, post, admin_token, user_token):
+        user_headers = {"Authorization": f"Bearer {user_token}"}
+        admin_headers = {"Authorization": f"Bearer {admin_token}"}
+        assert client.post("/categories", json={"name": "Poetry"}, headers=admin_headers).status_code == 201
+        assert client.patch(f"/users/{user}/make_admin", headers=admin_headers).status_code == 200
+        assert client.post(f"/favorites/{post}", headers=user_headers).status_code == 201
+        assert client.delete(f"/favorites/{post}", headers=user_headers).status_code == 200
+        assert client.delete("/users/me", headers=user_headers).status_code == 200
+
+    @pytest.mark.query_budget(0)
+    def test_marker_tightens_budget(self, client, post):
+        with pytest.raises(pytest.fail.Exception, match="get_post ran 1 SQL statements, budget is 0"):
+            client.get(f"/posts/{post}")
@@ -0,0 +1,42 @@
+import json
+import pytest
+
+def read_log(app):
+    for handler in app.extensions['slow_query'].handlers:
+        handler.flush()
+    try:
+        with open(app.config['SLOW_QUERY_LOG']) as f:
+            return [json.loads(line) for line in f]
+    except FileNotFoundError:
+        return []
+
+@pytest.fixture
+def slow_query_log(app, monkeypatch):
+    open(app.config['SLOW_QUERY_LOG'], 'w').close()
+    monkeypatch.setitem(app.config, 'SLOW_QUERY_THRESHOLD_MS', 0)
+
+class TestSlowQueryLog:
+
+    def test_select_logged_with_route_parameters_and_plan(self, app, client, post, slow_query_log):
+        client.get(f"/posts/{post}")
+        entries = [e for e in read_log(app) if e['route'] and e['statement'].lstrip().startswith('SELECT')]
+        assert entries
+        entry = entries[0]
+        assert entry['route']['rule'] == "/posts/<int:post_id>"
+        assert entry['route']['method'] == "GET"
+        assert post in entry['parameters']
+        assert entry['duration_ms'] >= 0
+        assert entry['plan'] and any('post' in line for line in entry['plan'])
+
+    def test_write_logged_without_plan(self, client, app, user_token, category, slow_query_log):
+        client.post("/posts", json={"title": "Slow", "content": "Query", "category_id": category},
+                    headers={"Authorization": f"Bearer {user_token}"})
+        inserts = [e for e in read_log(app) if e['statement'].startswith('INSERT INTO post ')]
+        assert inserts
+        assert inserts[0]['plan'] is None
+        assert inserts[0]['route']['rule'] == "/posts"
+
+    def test_fast_queries_not_logged(self, app, client, post, slow_query_log, monkeypatch):
+        monkeypatch.setitem(app.config, 'SLOW_QUERY_THRESHOLD_MS', 60_000)
+        client.get(f"/posts/{post}")
+        assert read_log(app) == []